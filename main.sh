@@ -1,2 +1,3 @@
-python3 src/main.py
-cd public && python3 -m http.server 8888
+python3 src/main.py --watch &
+trap 'kill $!' EXIT
+cd docs && python3 -m http.server 8888
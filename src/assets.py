@@ -0,0 +1,276 @@
+import errno
+import os
+import shutil
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+from manifest import CACHE_DIR, Delta, file_digest, load_manifest, save_manifest
+
+STATIC_MANIFEST = os.path.join(CACHE_DIR, "static.json")
+
+COPY_STRATEGIES = (
+    "auto",
+    "hardlink",
+    "reflink",
+    "copy_file_range",
+    "sendfile",
+    "buffered",
+)
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+BUFFER_SIZE = 1024 * 1024
+
+# errors that mean "this strategy is not supported here", not "the copy failed"
+_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EPERM,
+    errno.EBADF,
+}
+
+
+def sync_directory(
+    source: str,
+    destination: str,
+    manifest_path: str = STATIC_MANIFEST,
+    strategy: str = "auto",
+    workers: int | None = None,
+    only: Iterable[str] | None = None,
+) -> Delta:
+    old_manifest = load_manifest(manifest_path)
+    new_manifest: dict[str, dict] = {}
+    delta = Delta()
+    to_copy: list[tuple[str, str]] = []
+
+    if only is None:
+        rel_paths = walk_files(source)
+    else:
+        # a partial sync: everything outside `only` keeps its manifest entry
+        only = set(only)
+        rel_paths = sorted(
+            rel_path
+            for rel_path in only
+            if os.path.isfile(os.path.join(source, rel_path))
+        )
+        for rel_path, entry in old_manifest.items():
+            if rel_path not in only:
+                new_manifest[rel_path] = entry
+
+    for rel_path in rel_paths:
+        source_path = os.path.join(source, rel_path)
+        destination_path = os.path.join(destination, rel_path)
+        stat = os.stat(source_path)
+        entry = old_manifest.get(rel_path)
+
+        try:
+            destination_size = os.stat(destination_path).st_size
+        except FileNotFoundError:
+            destination_size = None
+
+        if (
+            entry is not None
+            and destination_size == stat.st_size
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            new_manifest[rel_path] = entry
+            continue
+
+        digest = file_digest(source_path)
+        new_manifest[rel_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+        }
+        if destination_size == stat.st_size:
+            # with no entry (a fresh cache, say) the destination itself may
+            # already be an identical copy
+            if entry is not None:
+                expected = entry["sha256"]
+            else:
+                expected = file_digest(destination_path)
+            if expected == digest:
+                continue
+
+        to_copy.append((source_path, destination_path))
+        if destination_size is None:
+            delta.added.append(rel_path)
+        else:
+            delta.changed.append(rel_path)
+
+    copy_files(to_copy, strategy, workers)
+
+    for rel_path in sorted(old_manifest.keys() - new_manifest.keys()):
+        remove_file(destination, rel_path)
+        delta.removed.append(rel_path)
+
+    save_manifest(manifest_path, new_manifest)
+    return delta
+
+
+def walk_files(root: str) -> list[str]:
+    rel_paths: list[str] = []
+    for dir_path, _, file_names in os.walk(root):
+        for file_name in file_names:
+            rel_paths.append(
+                os.path.relpath(os.path.join(dir_path, file_name), root)
+            )
+    return sorted(rel_paths)
+
+
+def remove_file(root: str, rel_path: str) -> None:
+    try:
+        os.remove(os.path.join(root, rel_path))
+    except FileNotFoundError:
+        pass
+
+    # drop directories left empty by the removal, but never the root itself
+    parent = os.path.dirname(rel_path)
+    while parent:
+        try:
+            os.rmdir(os.path.join(root, parent))
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def copy_directory(
+    source: str, destination: str, strategy: str = "auto", workers: int | None = None
+) -> None:
+    pairs = [
+        (os.path.join(source, rel_path), os.path.join(destination, rel_path))
+        for rel_path in walk_files(source)
+    ]
+    os.makedirs(destination, exist_ok=True)
+    copy_files(pairs, strategy, workers)
+
+
+def copy_files(
+    pairs: Iterable[tuple[str, str]], strategy: str = "auto", workers: int | None = None
+) -> None:
+    pairs = list(pairs)
+    if not pairs:
+        return
+    if strategy not in COPY_STRATEGIES:
+        raise ValueError(f"unknown copy strategy: {strategy}")
+
+    # create directories up front so the workers never race on makedirs
+    for directory in {os.path.dirname(dst) for _, dst in pairs}:
+        os.makedirs(directory, exist_ok=True)
+
+    if len(pairs) == 1 or (workers is not None and workers <= 1):
+        for src, dst in pairs:
+            copy_file(src, dst, strategy)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list() so an exception from any worker is raised here
+        list(executor.map(lambda pair: copy_file(*pair, strategy), pairs))
+
+
+def copy_file(source_path: str, destination_path: str, strategy: str = "auto") -> str:
+    same_device = _same_device(source_path, destination_path)
+
+    if strategy == "hardlink":
+        if same_device and _hardlink(source_path, destination_path):
+            return "hardlink"
+        strategy = "auto"
+
+    if strategy == "auto":
+        if same_device:
+            candidates = ["reflink", "copy_file_range", "sendfile"]
+        else:
+            candidates = ["copy_file_range", "sendfile"]
+    elif strategy == "buffered":
+        candidates = []
+    else:
+        candidates = [strategy]
+
+    # write next to the destination and swap it in, so a destination that is
+    # a hardlink to its source is replaced rather than truncated
+    tmp_path = f"{destination_path}.copy-tmp"
+    try:
+        with open(source_path, "rb") as src, open(tmp_path, "wb") as dst:
+            used = "buffered"
+            for candidate in candidates:
+                try:
+                    _KERNEL_COPIES[candidate](src.fileno(), dst.fileno())
+                    used = candidate
+                    break
+                except OSError as e:
+                    if e.errno not in _UNSUPPORTED:
+                        raise
+                    # start over: the failed attempt may have written a prefix
+                    os.ftruncate(dst.fileno(), 0)
+                    os.lseek(src.fileno(), 0, os.SEEK_SET)
+                    os.lseek(dst.fileno(), 0, os.SEEK_SET)
+            if used == "buffered":
+                shutil.copyfileobj(src, dst, BUFFER_SIZE)
+
+        shutil.copymode(source_path, tmp_path)
+        os.replace(tmp_path, destination_path)
+    finally:
+        # only left behind if the copy failed part way
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+    return used
+
+
+def _same_device(source_path: str, destination_path: str) -> bool:
+    try:
+        destination_dir = os.path.dirname(destination_path) or "."
+        return os.stat(source_path).st_dev == os.stat(destination_dir).st_dev
+    except OSError:
+        return False
+
+
+def _hardlink(source_path: str, destination_path: str) -> bool:
+    tmp_path = f"{destination_path}.link-tmp"
+    try:
+        os.link(source_path, tmp_path)
+    except OSError:
+        return False
+    os.replace(tmp_path, destination_path)
+    return True
+
+
+def _reflink(src_fd: int, dst_fd: int) -> None:
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "reflink is not supported on this platform")
+    fcntl.ioctl(dst_fd, FICLONE, src_fd)
+
+
+def _copy_file_range(src_fd: int, dst_fd: int) -> None:
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    while os.copy_file_range(src_fd, dst_fd, BUFFER_SIZE * 64) > 0:
+        pass
+
+
+def _sendfile(src_fd: int, dst_fd: int) -> None:
+    if not hasattr(os, "sendfile"):
+        raise OSError(errno.ENOSYS, "sendfile is not available")
+    offset = 0
+    while True:
+        sent = os.sendfile(dst_fd, src_fd, offset, BUFFER_SIZE * 64)
+        if sent == 0:
+            break
+        offset += sent
+
+
+_KERNEL_COPIES = {
+    "reflink": _reflink,
+    "copy_file_range": _copy_file_range,
+    "sendfile": _sendfile,
+}
@@ -0,0 +1,265 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from contextlib import redirect_stdout
+
+from blocks import block_to_block_type
+from conversions import markdown_to_blocks, text_to_textnodes
+from flatdoc import flatten_markdown
+from generate_html import generate_pages_recursive
+from markdown_to_html import markdown_to_html_node
+
+BENCH_FORMAT = 1
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron "
+    "and carried by frodo through the mines of moria to the gates of mordor"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+class CorpusConfig:
+    def __init__(
+        self,
+        pages: int = 50,
+        blocks_per_page: int = 40,
+        list_density: float = 0.2,
+        quote_density: float = 0.1,
+        inline_density: float = 0.2,
+        seed: int = 0,
+    ) -> None:
+        self.pages: int = pages
+        self.blocks_per_page: int = blocks_per_page
+        self.list_density: float = list_density
+        self.quote_density: float = quote_density
+        self.inline_density: float = inline_density
+        self.seed: int = seed
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def make_page(rng: random.Random, config: CorpusConfig, title: str) -> str:
+    blocks = [f"# {title}"]
+    for _ in range(config.blocks_per_page):
+        roll = rng.random()
+        if roll < config.list_density:
+            ordered = rng.random() < 0.5
+            items = [
+                _sentence(rng, config, 4, 12) for _ in range(rng.randint(2, 8))
+            ]
+            blocks.append(
+                "\n".join(
+                    f"{i}. {item}" if ordered else f"- {item}"
+                    for i, item in enumerate(items, 1)
+                )
+            )
+        elif roll < config.list_density + config.quote_density:
+            lines = [_sentence(rng, config, 6, 14) for _ in range(rng.randint(1, 4))]
+            blocks.append("\n".join(f"> {line}" for line in lines))
+        elif roll < config.list_density + config.quote_density + 0.05:
+            blocks.append(f"## {_sentence(rng, config, 2, 6)}")
+        elif roll < config.list_density + config.quote_density + 0.08:
+            lines = [" ".join(rng.choices(WORDS, k=6)) for _ in range(4)]
+            blocks.append("```\n" + "\n".join(lines) + "\n```")
+        else:
+            lines = [_sentence(rng, config, 8, 20) for _ in range(rng.randint(1, 5))]
+            blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_corpus(root: str, config: CorpusConfig) -> list[str]:
+    rng = random.Random(config.seed)
+    paths: list[str] = []
+    for i in range(config.pages):
+        path = os.path.join(root, f"page{i:05d}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(make_page(rng, config, f"Page {i}"))
+        paths.append(path)
+    return paths
+
+
+def time_it(fn: Callable[[], object], repeat: int) -> dict:
+    timings: list[int] = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        timings.append(time.perf_counter_ns() - start)
+    return {
+        "min_ms": round(min(timings) / 1_000_000, 3),
+        "median_ms": round(statistics.median(timings) / 1_000_000, 3),
+        "runs": repeat,
+    }
+
+
+def run_benchmarks(config: CorpusConfig, repeat: int = 5, jobs: int = 1) -> dict:
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        paths = generate_corpus(content, config)
+        documents: list[str] = []
+        for path in paths:
+            with open(path) as f:
+                documents.append(f.read())
+
+        blocks = [block for doc in documents for block in markdown_to_blocks(doc)]
+        texts = [block.replace("\n", " ") for block in blocks if "```" not in block]
+        tracemalloc.start()
+        nodes = [markdown_to_html_node(doc) for doc in documents]
+        tree_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        tracemalloc.start()
+        flat = [flatten_markdown(doc) for doc in documents]
+        flat_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        results["markdown_to_blocks"] = time_it(
+            lambda: [markdown_to_blocks(doc) for doc in documents], repeat
+        )
+        results["block_to_block_type"] = time_it(
+            lambda: [block_to_block_type(block) for block in blocks], repeat
+        )
+        results["text_to_textnodes"] = time_it(
+            lambda: [text_to_textnodes(text) for text in texts], repeat
+        )
+        results["ParentNode.to_html"] = time_it(
+            lambda: [node.to_html() for node in nodes], repeat
+        )
+        results["FlatDocument.to_html"] = time_it(
+            lambda: [document.to_html() for document in flat], repeat
+        )
+
+        template = os.path.join(tmp, "template.html")
+        with open(template, "w") as f:
+            f.write(TEMPLATE)
+
+        runs = itertools.count()
+
+        def full_build() -> None:
+            # a fresh output and cache each run, so this measures a cold build
+            run = next(runs)
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                generate_pages_recursive(
+                    content,
+                    template,
+                    os.path.join(tmp, f"docs{run}"),
+                    "/",
+                    os.path.join(tmp, f"pages{run}.json"),
+                    jobs,
+                    body_cache=os.path.join(tmp, f"bodies{run}"),
+                )
+
+        results["generate_pages_recursive"] = time_it(full_build, repeat)
+
+    return {
+        "format": BENCH_FORMAT,
+        "python": platform.python_version(),
+        "config": {**config.to_dict(), "repeat": repeat, "jobs": jobs},
+        "corpus_bytes": sum(len(doc.encode("utf-8")) for doc in documents),
+        "html_tree_bytes": tree_bytes,
+        "flat_document_bytes": flat_bytes,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list[str]:
+    regressions: list[str] = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None or before["min_ms"] == 0:
+            continue
+        change = result["min_ms"] / before["min_ms"] - 1
+        if change > threshold:
+            regressions.append(
+                f"{name}: {before['min_ms']}ms -> {result['min_ms']}ms "
+                f"(+{change:.0%})"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the site generator")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--blocks-per-page", type=int, default=40)
+    parser.add_argument("--list-density", type=float, default=0.2)
+    parser.add_argument("--quote-density", type=float, default=0.1)
+    parser.add_argument("--inline-density", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline results to check against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown (as a fraction) that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    config = CorpusConfig(
+        pages=args.pages,
+        blocks_per_page=args.blocks_per_page,
+        list_density=args.list_density,
+        quote_density=args.quote_density,
+        inline_density=args.inline_density,
+        seed=args.seed,
+    )
+    results = run_benchmarks(config, args.repeat, args.jobs)
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+def _sentence(rng: random.Random, config: CorpusConfig, low: int, high: int) -> str:
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    for i in range(len(words)):
+        if rng.random() >= config.inline_density:
+            continue
+        match rng.randrange(5):
+            case 0:
+                words[i] = f"**{words[i]}**"
+            case 1:
+                words[i] = f"_{words[i]}_"
+            case 2:
+                words[i] = f"`{words[i]}`"
+            case 3:
+                words[i] = f"[{words[i]}](/{words[i]})"
+            case 4:
+                words[i] = f"![{words[i]}](/images/{words[i]}.png)"
+    return " ".join(words)
+
+
+if __name__ == "__main__":
+    main()
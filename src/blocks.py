@@ -1,5 +1,11 @@
 import re
+from collections.abc import Iterable, Iterator
 from enum import Enum
+from typing import NamedTuple
+
+# match() anchors these at the position it is given
+HEADING_PATTERN = re.compile(r"#{1,6} ")
+ORDERED_ITEM_PATTERN = re.compile(r"[1-9]\d*\. ")
 
 
 class BlockType(Enum):
@@ -11,26 +17,104 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+class Block(NamedTuple):
+    block_type: BlockType
+    source: str
+    start: int
+    end: int
+
+    @property
+    def text(self) -> str:
+        return self.source[self.start : self.end]
+
+    def lines(self) -> list[tuple[int, int]]:
+        # (start, end) of every line of the block, as offsets into source
+        source, end = self.source, self.end
+        lines: list[tuple[int, int]] = []
+        line_start = self.start
+        newline = source.find("\n", line_start, end)
+        while newline != -1:
+            lines.append((line_start, newline))
+            line_start = newline + 1
+            newline = source.find("\n", line_start, end)
+        lines.append((line_start, end))
+        return lines
+
+
 def block_to_block_type(block: str) -> BlockType:
-    if re.match(r"^#{1,6} ", block):
+    first_line = block.strip("\n").partition("\n")[0]
+    return _block_type(block, 0, len(block), first_line)
+
+
+def lex_blocks(markdown: str) -> Iterator[Block]:
+    # Blocks are what markdown.split("\n\n") would give, stripped and with
+    # empty ones dropped, but found by position: nothing is copied until a
+    # caller slices a block or one of its lines out of the source.
+    length = len(markdown)
+    position = 0
+    while position <= length:
+        boundary = markdown.find("\n\n", position)
+        if boundary == -1:
+            boundary = length
+        start, end = _strip(markdown, position, boundary)
+        if start < end:
+            yield _lex_block(markdown, start, end)
+        position = boundary + 2
+
+
+def lex_lines(lines: Iterable[str]) -> Iterator[Block]:
+    # The same blocks as lex_blocks, from lines read one at a time (each
+    # ending in "\n", except perhaps the last). Only the lines of the block
+    # being built are held; each block is its own source.
+    run: list[str] = []
+    for line in lines:
+        if line != "\n":
+            run.append(line)
+        elif run:
+            yield from _lex_run(run)
+            run = []
+    if run:
+        yield from _lex_run(run)
+
+
+def _lex_run(run: list[str]) -> Iterator[Block]:
+    source = "".join(run)
+    start, end = _strip(source, 0, len(source))
+    if start < end:
+        yield _lex_block(source, start, end)
+
+
+def _strip(source: str, start: int, end: int) -> tuple[int, int]:
+    # the span source[start:end].strip() would return
+    while start < end and source[start].isspace():
+        start += 1
+    while end > start and source[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _lex_block(markdown: str, start: int, end: int) -> Block:
+    first_end = markdown.find("\n", start, end)
+    first_line = markdown[start : end if first_end == -1 else first_end]
+    block_type = _block_type(markdown, start, end, first_line)
+    return Block(block_type, markdown, start, end)
+
+
+def _block_type(source: str, start: int, end: int, first_line: str) -> BlockType:
+    if HEADING_PATTERN.match(source, start, end):
         return BlockType.HEADING
 
-    if block.startswith("```\n") and block.endswith("```"):
+    if source.startswith("```\n", start, end) and source.endswith("```", start, end):
         return BlockType.CODE
 
-    for line in block.strip("\n").split("\n"):
-        if not line.startswith(">"):
-            break
+    # only the first line decides whether a block is a quote or a list
+    if first_line.startswith(">"):
         return BlockType.QUOTE
 
-    for line in block.strip("\n").split("\n"):
-        if not line.startswith("- "):
-            break
+    if first_line.startswith("- "):
         return BlockType.UNORDERED_LIST
 
-    for line in block.strip("\n").split("\n"):
-        if not re.match(r"^[1-9]\d*\. ", line):
-            break
+    if ORDERED_ITEM_PATTERN.match(first_line):
         return BlockType.ORDERED_LIST
 
     return BlockType.PARAGRAPH
@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+from typing import TextIO
+
+# Bodies are cached with this character standing in for the basepath, then
+# split on it, so the same entry can be re-based for any basepath later.
+BASEPATH_SENTINEL = "\x00"
+
+
+def body_path(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, f"{digest}.json")
+
+
+def load_body(
+    cache_dir: str, digest: str, version: int
+) -> tuple[str, list[str]] | None:
+    try:
+        with open(body_path(cache_dir, digest), "r", encoding="utf-8") as f:
+            body = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if body.get("version") != version:
+        return None
+    return body["title"], body["parts"]
+
+
+class BodyWriter:
+    # Writes a body to the cache while it streams to the page, so neither
+    # holds the whole body in memory. The JSON is written by hand, one
+    # escaped piece at a time. The cache is best effort: if a write fails,
+    # the entry is dropped and the page is still written.
+    def __init__(self, cache_dir: str, digest: str, version: int, title: str) -> None:
+        self.path: str = body_path(cache_dir, digest)
+        self.tmp_path: str | None = None
+        self.file: TextIO | None = None
+        self.pending: bool = False
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # unique per writer: pages with identical sources share a digest
+            fd, self.tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            self.file = os.fdopen(fd, "w", encoding="utf-8")
+            header = json.dumps({"version": version, "title": title})
+            self.file.write(f'{header[:-1]}, "parts": ["')
+        except OSError:
+            self.discard()
+
+    def __enter__(self) -> "BodyWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None and not self.pending:
+            self.commit()
+        else:
+            self.discard()
+
+    def write(self, chunk: str) -> list[str]:
+        # the chunk split on the sentinel; parts continue across chunks
+        pieces = chunk.split(BASEPATH_SENTINEL)
+        if self.file is not None:
+            try:
+                self.file.write('", "'.join([json.dumps(p)[1:-1] for p in pieces]))
+            except OSError:
+                self.discard()
+        return pieces
+
+    def tee(self, chunks: Iterable[str], basepath: str) -> Iterator[str]:
+        self.pending = True
+        for chunk in chunks:
+            yield basepath.join(self.write(chunk))
+        self.pending = False
+
+    def commit(self) -> None:
+        if self.file is None or self.tmp_path is None:
+            return
+        try:
+            self.file.write('"]}')
+            self.file.close()
+            os.replace(self.tmp_path, self.path)
+        except OSError:
+            self.discard()
+        self.file = None
+
+    def discard(self) -> None:
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError:
+                pass
+            self.file = None
+        if self.tmp_path is not None:
+            try:
+                os.remove(self.tmp_path)
+            except FileNotFoundError:
+                pass
+            self.tmp_path = None
+
+
+def prune_bodies(cache_dir: str, keep: set[str | None]) -> None:
+    try:
+        entries = os.scandir(cache_dir)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            digest, extension = os.path.splitext(entry.name)
+            if extension == ".json" and digest not in keep:
+                os.remove(entry.path)
+
+
+def rebase(parts: list[str], basepath: str) -> Iterator[str]:
+    yield parts[0]
+    for part in parts[1:]:
+        yield basepath
+        yield part
@@ -0,0 +1,63 @@
+import os
+from typing import NamedTuple
+
+
+class Page(NamedTuple):
+    source: str
+    dest: str
+    rel_path: str
+    size: int
+    mtime_ns: int
+
+
+def collect_pages(dir_path_content: str, dest_dir_path: str) -> list[Page]:
+    pages: list[Page] = []
+    # (content directory, matching output directory); an explicit stack keeps
+    # arbitrarily deep trees clear of the recursion limit
+    stack = [(dir_path_content, dest_dir_path)]
+    while stack:
+        content_dir, dest_dir = stack.pop()
+        with os.scandir(content_dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append((entry.path, os.path.join(dest_dir, entry.name)))
+                    continue
+
+                # DirEntry caches the stat result, so this is the only stat
+                # the build needs for the source
+                stat = entry.stat()
+                pages.append(
+                    _page(
+                        entry.path,
+                        dest_dir,
+                        dest_dir_path,
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                    )
+                )
+
+    pages.sort(key=lambda page: page.rel_path)
+    return pages
+
+
+def page_for(
+    source: str, dir_path_content: str, dest_dir_path: str, size: int, mtime_ns: int
+) -> Page:
+    # the Page collect_pages would give for one source, without a walk
+    rel_dir = os.path.relpath(os.path.dirname(source), dir_path_content)
+    dest_dir = dest_dir_path if rel_dir == "." else os.path.join(dest_dir_path, rel_dir)
+    return _page(source, dest_dir, dest_dir_path, size, mtime_ns)
+
+
+def _page(
+    source: str, dest_dir: str, dest_dir_path: str, size: int, mtime_ns: int
+) -> Page:
+    name = os.path.basename(source).replace(".md", ".html")
+    dest_path = os.path.join(dest_dir, name)
+    return Page(
+        source=source,
+        dest=dest_path,
+        rel_path=os.path.relpath(dest_path, dest_dir_path),
+        size=size,
+        mtime_ns=mtime_ns,
+    )
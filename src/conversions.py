@@ -1,10 +1,36 @@
+import functools
 import re
 
+from blocks import lex_blocks
 from htmlnode import LeafNode
 from textnode import TextNode, TextType
 
+type InlineTuples = tuple[tuple[str, TextType, str | None], ...]
 
-def text_node_to_html_node(text_node: TextNode):
+# opt-in, see set_inline_cache
+_inline_cache: "functools._lru_cache_wrapper[InlineTuples] | None" = None
+
+# text without any of these characters has no inline markup at all
+MARKUP_PATTERN = re.compile(r"[*_`\[]")
+DELIMITER_PATTERN = re.compile(r"\*\*|_|`")
+DELIMITER_TYPES = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+# images and links in one pattern; the "!" decides which a match is
+IMAGE_OR_LINK_PATTERN = re.compile(r"(!?)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+
+def resolve_url(url: str | None, basepath: str = "/") -> str | None:
+    # root-relative urls are served from under the basepath; leave absolute,
+    # relative and protocol-relative ("//host/...") urls alone
+    if basepath == "/" or url is None or not url.startswith("/"):
+        return url
+    if url.startswith("//"):
+        return url
+    return basepath + url[1:]
+
+
+def text_node_to_html_node(text_node: TextNode, basepath: str = "/"):
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
@@ -15,9 +41,15 @@ def text_node_to_html_node(text_node: TextNode):
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            return LeafNode(
+                "a", text_node.text, {"href": resolve_url(text_node.url, basepath)}
+            )
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            return LeafNode(
+                "img",
+                "",
+                {"src": resolve_url(text_node.url, basepath), "alt": text_node.text},
+            )
 
 
 def split_nodes_delimiter(
@@ -46,86 +78,150 @@ def split_nodes_delimiter(
 
 
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
-
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
 def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
-    new_nodes: list[TextNode] = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-            continue
-
-        matches = extract_markdown_images(node.text)
-        if len(matches) == 0:
-            new_nodes.append(node)
-            continue
-
-        curr_text = node.text
-        for match in matches:
-            alt, url = match[0], match[1]
+    return _split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
-            sections = curr_text.split(f"![{alt}]({url})")
-            before = sections[0]
-            curr_text = sections[1] if len(sections) > 1 else ""
 
-            if before != "":
-                new_nodes.append(TextNode(before, TextType.TEXT))
-
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-
-        if curr_text != "":
-            new_nodes.append(TextNode(curr_text, TextType.TEXT))
-
-    return new_nodes
+def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
+    return _split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
 
 
-def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
+def _split_nodes_pattern(
+    old_nodes: list[TextNode], pattern: re.Pattern[str], text_type: TextType
+) -> list[TextNode]:
+    # slice between match spans, so each text node is scanned exactly once
     new_nodes: list[TextNode] = []
     for node in old_nodes:
-        if node.text_type != TextType.TEXT:
+        if node.text_type != TextType.TEXT or "[" not in node.text:
             new_nodes.append(node)
             continue
 
-        matches = extract_markdown_links(node.text)
-        if len(matches) == 0:
-            new_nodes.append(node)
-            continue
-
-        curr_text = node.text
-        for match in matches:
-            src, url = match[0], match[1]
-
-            sections = curr_text.split(f"[{src}]({url})")
-            before = sections[0]
-            curr_text = sections[1] if len(sections) > 1 else ""
+        text = node.text
+        position = 0
+        for match in pattern.finditer(text):
+            start = match.start()
+            if start > position:
+                new_nodes.append(TextNode(text[position:start], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = match.end()
 
-            if before != "":
-                new_nodes.append(TextNode(before, TextType.TEXT))
-
-            new_nodes.append(TextNode(src, TextType.LINK, url))
-
-        if curr_text != "":
-            new_nodes.append(TextNode(curr_text, TextType.TEXT))
+        if position == 0:
+            new_nodes.append(node)
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
 
     return new_nodes
 
 
 def text_to_textnodes(text: str) -> list[TextNode]:
-    nodes = split_nodes_delimiter([TextNode(text, TextType.TEXT)], "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    return split_nodes_link(nodes)
+    if not text:
+        return []
+    if MARKUP_PATTERN.search(text) is None:
+        return [TextNode(text, TextType.TEXT)]
+
+    # One left-to-right scan. It gives the same result as splitting on "**",
+    # then "_", then "`", then images and links: a span may not cross a
+    # delimiter that an earlier pass would have split on, and images and
+    # links are only looked for in the plain text between spans.
+    nodes: list[TextNode] = []
+    plain = 0
+    # the next "**" and "_" at or after the scan position, found again only
+    # once the scan has moved past them, so the text is not rescanned for
+    # every span
+    bold = text.find("**")
+    underscore = text.find("_")
+    match = DELIMITER_PATTERN.search(text)
+    while match is not None:
+        delimiter = match.group()
+        start = match.end()
+        if delimiter == "**":
+            end = text.find("**", start)
+        else:
+            if 0 <= bold < start:
+                bold = text.find("**", start)
+            bound = len(text) if bold == -1 else bold
+            if delimiter == "`":
+                if 0 <= underscore < start:
+                    underscore = text.find("_", start)
+                if 0 <= underscore < bound:
+                    bound = underscore
+            end = text.find(delimiter, start, bound)
+        if end == -1:
+            unclosed = _unclosed(text, delimiter)
+            raise ValueError(f"invalid markdown: missing closing delimiter, {unclosed}")
+
+        _split_images_and_links(text, plain, match.start(), nodes)
+        if end > start:
+            nodes.append(TextNode(text[start:end], DELIMITER_TYPES[delimiter]))
+        plain = end + len(delimiter)
+        match = DELIMITER_PATTERN.search(text, plain)
+    _split_images_and_links(text, plain, len(text), nodes)
+    return nodes
+
+
+def set_inline_cache(maxsize: int) -> None:
+    # a bounded LRU of parse results shared by every page in this process;
+    # 0 turns it off. Entries are tuples, so a cached parse cannot be mutated
+    global _inline_cache
+    if maxsize <= 0:
+        _inline_cache = None
+    else:
+        _inline_cache = functools.lru_cache(maxsize=maxsize)(_inline_tuples)
+
+
+def inline_cache_info() -> "functools._CacheInfo | None":
+    return None if _inline_cache is None else _inline_cache.cache_info()
+
+
+def parse_inline(text: str) -> list[TextNode]:
+    if _inline_cache is None:
+        return text_to_textnodes(text)
+    return [TextNode(*fields) for fields in _inline_cache(text)]
+
+
+def _inline_tuples(text: str) -> InlineTuples:
+    nodes = text_to_textnodes(text)
+    return tuple((node.text, node.text_type, node.url) for node in nodes)
+
+
+def _unclosed(text: str, delimiter: str) -> str:
+    # report what the pass-per-delimiter pipeline would have: bold is checked
+    # over the whole text first, then italics, then code
+    if text.count("**") % 2 != 0:
+        return "**"
+    if delimiter == "`":
+        if any(part.count("_") % 2 != 0 for part in text.split("**")[::2]):
+            return "_"
+    return delimiter
+
+
+def _split_images_and_links(
+    text: str, start: int, end: int, nodes: list[TextNode]
+) -> None:
+    if start == end:
+        return
+    if text.find("[", start, end) == -1:
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
+        return
+
+    position = start
+    for match in IMAGE_OR_LINK_PATTERN.finditer(text, start, end):
+        if match.start() > position:
+            nodes.append(TextNode(text[position : match.start()], TextType.TEXT))
+        bang, label, url = match.groups()
+        text_type = TextType.IMAGE if bang else TextType.LINK
+        nodes.append(TextNode(label, text_type, url))
+        position = match.end()
+    if position < end:
+        nodes.append(TextNode(text[position:end], TextType.TEXT))
 
 
 def markdown_to_blocks(markdown: str) -> list[str]:
-    blocks = [block.strip() for block in markdown.split("\n\n")]
-    blocks = [block for block in blocks if block != ""]
-
-    return blocks
+    return [block.text for block in lex_blocks(markdown)]
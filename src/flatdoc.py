@@ -0,0 +1,279 @@
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterator
+from enum import IntEnum
+from typing import override
+
+from blocks import BlockType, lex_blocks
+from conversions import parse_inline, resolve_url
+from htmlnode import (
+    CHUNK_PIECES,
+    HTMLNode,
+    LeafNode,
+    ParentNode,
+    Props,
+    escape_text,
+    render_props,
+)
+from textnode import TextType
+
+INLINE_TAGS = {
+    TextType.TEXT: None,
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+    TextType.LINK: "a",
+    TextType.IMAGE: "img",
+}
+
+NO_PROPS = -1
+
+
+class Op(IntEnum):
+    OPEN = 0
+    CLOSE = 1
+    LEAF = 2
+
+
+class FlatDocument:
+    # One row per opcode across parallel arrays instead of one object per
+    # node. Leaf text is a [start, end) span of buffer, which begins with the
+    # markdown source itself; only text that is not a verbatim slice of the
+    # source (paragraph lines joined with spaces, say) is appended after it.
+    __slots__ = (
+        "buffer",
+        "ops",
+        "tags",
+        "starts",
+        "ends",
+        "props",
+        "tag_names",
+        "prop_values",
+    )
+
+    def __init__(self, source: str) -> None:
+        self.buffer: str = source
+        self.ops: array = array("B")
+        self.tags: array = array("H")
+        self.starts: array = array("q")
+        self.ends: array = array("q")
+        self.props: array = array("l")
+        self.tag_names: list[str | None] = [None]
+        self.prop_values: list[Props] = []
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def to_html(self) -> str:
+        return "".join(self._render(sys.maxsize))
+
+    def iter_html(self) -> Iterator[str]:
+        return self._render(CHUNK_PIECES)
+
+    def to_node(self) -> HTMLNode:
+        buffer = self.buffer
+        names = self.tag_names
+        values = self.prop_values
+        root: list[HTMLNode] = []
+        children = root
+        stack: list[tuple[int, int, list[HTMLNode]]] = []
+        rows = zip(self.ops, self.tags, self.starts, self.ends, self.props)
+        for op, tag, start, end, props in rows:
+            if op == Op.LEAF:
+                value = buffer[start:end]
+                leaf_props = None if props == NO_PROPS else values[props]
+                children.append(LeafNode(names[tag], value, leaf_props))
+            elif op == Op.OPEN:
+                stack.append((tag, props, children))
+                children = []
+            else:
+                tag, props, parent = stack.pop()
+                name = names[tag] or ""
+                parent_props = None if props == NO_PROPS else values[props]
+                parent.append(ParentNode(name, children, parent_props))
+                children = parent
+        return root[0]
+
+    def _render(self, chunk_pieces: int) -> Iterator[str]:
+        buffer = self.buffer
+        names = self.tag_names
+        attributes = [render_props(props) for props in self.prop_values]
+        pieces: list[str] = []
+        append = pieces.append
+        closing_tags: list[str] = []
+        # plain ints: comparing against the enum members costs a lookup each
+        leaf, open_ = int(Op.LEAF), int(Op.OPEN)
+        rows = zip(self.ops, self.tags, self.starts, self.ends, self.props)
+        for op, tag, start, end, props in rows:
+            if op == leaf:
+                text = escape_text(buffer[start:end])
+                name = names[tag]
+                if name is None:
+                    append(text)
+                else:
+                    attrs = "" if props == NO_PROPS else attributes[props]
+                    append(f"<{name}{attrs}>{text}</{name}>")
+            elif op == open_:
+                name = names[tag]
+                attrs = "" if props == NO_PROPS else attributes[props]
+                append(f"<{name}{attrs}>")
+                closing_tags.append(f"</{name}>")
+            else:
+                append(closing_tags.pop())
+
+            if len(pieces) >= chunk_pieces:
+                yield "".join(pieces)
+                pieces.clear()
+
+        if pieces:
+            yield "".join(pieces)
+
+    @override
+    def __repr__(self) -> str:
+        return f"FlatDocument(rows: {len(self.ops)}\nbuffer: {len(self.buffer)})"
+
+
+class _Builder:
+    def __init__(self, source: str) -> None:
+        self.document: FlatDocument = FlatDocument(source)
+        self.source: str = source
+        self.extra: list[str] = []
+        self.length: int = len(source)
+        self.tag_ids: dict[str | None, int] = {None: 0}
+
+    def open(self, tag: str) -> None:
+        self._row(Op.OPEN, tag, 0, 0, None)
+
+    def close(self) -> None:
+        self._row(Op.CLOSE, None, 0, 0, None)
+
+    def span(self, tag: str | None, start: int, end: int) -> None:
+        self._row(Op.LEAF, tag, start, end, None)
+
+    def leaf(self, tag: str | None, text: str, start: int, props: Props) -> None:
+        # start is where text occurs verbatim in the source, or -1 for text
+        # that does not (a piece spanning a joined line break, say)
+        if start == -1:
+            self.extra.append(text)
+            start = self.length
+            self.length += len(text)
+        self._row(Op.LEAF, tag, start, start + len(text), props)
+
+    def finish(self) -> FlatDocument:
+        document = self.document
+        if self.extra:
+            document.buffer = self.source + "".join(self.extra)
+        return document
+
+    def _row(
+        self, op: Op, tag: str | None, start: int, end: int, props: Props
+    ) -> None:
+        document = self.document
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = self.tag_ids[tag] = len(document.tag_names)
+            document.tag_names.append(tag)
+        if props is None:
+            props_id = NO_PROPS
+        else:
+            props_id = len(document.prop_values)
+            document.prop_values.append(props)
+        document.ops.append(op)
+        document.tags.append(tag_id)
+        document.starts.append(start)
+        document.ends.append(end)
+        document.props.append(props_id)
+
+
+def flatten_markdown(markdown: str, basepath: str = "/") -> FlatDocument:
+    builder = _Builder(markdown)
+    builder.open("div")
+    for block in lex_blocks(markdown):
+        match block.block_type:
+            case BlockType.PARAGRAPH:
+                # same length as the block, so offsets carry over unchanged
+                text = block.text.replace("\n", " ")
+                _inline(builder, "p", text, [(0, block.start)], basepath)
+            case BlockType.HEADING:
+                prefix, rest = block.text.split(" ", 1)
+                tag = f"h{len(prefix)}"
+                start = block.start + len(prefix) + 1 + _indent(rest)
+                _inline(builder, tag, rest.strip(), [(0, start)], basepath)
+            case BlockType.CODE:
+                lines = block.lines()
+                # the code between the fences, and the newline before the
+                # closing one, is a single span of the source
+                fence_end = lines[0][1]
+                start = fence_end + 1 if len(lines) > 2 else fence_end
+                builder.open("pre")
+                builder.span("code", start, lines[-2][1] + 1)
+                builder.close()
+            case BlockType.QUOTE:
+                pieces: list[str] = []
+                segments: list[tuple[int, int]] = []
+                offset = 0
+                for start, end in block.lines():
+                    line = markdown[start:end]
+                    piece = line.strip(">").strip()
+                    unquoted = line.lstrip(">")
+                    lead = len(line) - len(unquoted) + _indent(unquoted)
+                    segments.append((offset, start + lead))
+                    pieces.append(piece)
+                    offset += len(piece) + 1
+                _inline(builder, "blockquote", " ".join(pieces), segments, basepath)
+            case BlockType.UNORDERED_LIST:
+                builder.open("ul")
+                for start, end in block.lines():
+                    item_text = markdown[start + 2 : end]
+                    _inline(builder, "li", item_text, [(0, start + 2)], basepath)
+                builder.close()
+            case BlockType.ORDERED_LIST:
+                builder.open("ol")
+                for start, end in block.lines():
+                    line = markdown[start:end]
+                    _, item_text = line.split(". ", 1)
+                    item_start = start + line.index(". ") + 2
+                    _inline(builder, "li", item_text, [(0, item_start)], basepath)
+                builder.close()
+    builder.close()
+    return builder.finish()
+
+
+def _indent(text: str) -> int:
+    return len(text) - len(text.lstrip())
+
+
+def _inline(
+    builder: _Builder,
+    tag: str,
+    text: str,
+    segments: list[tuple[int, int]],
+    basepath: str,
+) -> None:
+    # segments map offsets in text to the source: (offset in text, offset in
+    # the source) for each run of text copied verbatim from the source
+    source = builder.source
+    offsets = [offset for offset, _ in segments]
+    stripped = text.strip("\n")
+    cursor = len(text) - len(text.lstrip("\n"))
+    builder.open(tag)
+    for node in parse_inline(stripped):
+        props: Props = None
+        value = node.text
+        if node.text_type == TextType.LINK:
+            props = {"href": resolve_url(node.url, basepath)}
+        elif node.text_type == TextType.IMAGE:
+            props = {"src": resolve_url(node.url, basepath), "alt": node.text}
+            value = ""
+        start = 0 if not value else -1
+        # pieces come in order, so each is looked for after the last one
+        position = text.find(value, cursor) if value else -1
+        if position != -1:
+            cursor = position + len(value)
+            segment = bisect_right(offsets, position) - 1
+            offset, source_start = segments[segment]
+            if source.startswith(value, source_start + position - offset):
+                start = source_start + position - offset
+        builder.leaf(INLINE_TAGS[node.text_type], value, start, props)
+    builder.close()
@@ -1,60 +1,371 @@
+import hashlib
 import os
-from markdown_to_html import markdown_to_html_node
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from assets import remove_file
+from body_cache import (
+    BASEPATH_SENTINEL,
+    BodyWriter,
+    load_body,
+    prune_bodies,
+    rebase,
+)
+from content import Page, collect_pages
+from conversions import inline_cache_info, set_inline_cache
+from htmlnode import HTMLNode, escape_text
+from manifest import CACHE_DIR, Delta, file_digest, load_manifest, save_manifest
+from markdown_to_html import parse_markdown, stream_markdown
+from profiling import PageProfile
+from template import Template, load_template
+
+PAGES_MANIFEST = os.path.join(CACHE_DIR, "pages.json")
+BODY_CACHE = os.path.join(CACHE_DIR, "bodies")
+
+# bump whenever a change to the generator alters its output, so every
+# cached page is rebuilt on the next run
+GENERATOR_VERSION = 3
+
+WRITE_BUFFER = 64 * 1024
+
+# sources larger than this are converted block by block, straight from the
+# file to the output, instead of being read and parsed whole
+STREAM_THRESHOLD = 32 * 1024 * 1024
+
+MISSING_TITLE = "All markdown titles must start with: # "
 
 
 def extract_title(markdown: str) -> str:
-    if not markdown.strip().startswith("# "):
-        raise Exception("All markdown titles must start with: # ")
-    return markdown.strip().strip("# ")
+    first_line = markdown.strip().partition("\n")[0]
+    if not first_line.startswith("# "):
+        raise Exception(MISSING_TITLE)
+    return first_line.strip("# ")
+
+
+def generate_page(
+    from_path: str, template_path: str, dest_path: str, basepath="/"
+) -> str | None:
+    status, _ = build_page(from_path, template_path, dest_path, basepath)
+    return status
+
+
+def build_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    basepath: str = "/",
+    cached: dict | None = None,
+    source_stat: tuple[int, int] | None = None,
+    profile: PageProfile | None = None,
+    body_cache: str | None = None,
+) -> tuple[str | None, dict | None]:
+    if source_stat is None:
+        try:
+            stat = os.stat(from_path)
+        except FileNotFoundError as e:
+            print(e)
+            return None, None
+        source_stat = (stat.st_size, stat.st_mtime_ns)
+    # a missing or broken template fails the page instead of skipping it,
+    # so its output is not pruned as if the source had gone
+    template = load_template(template_path, basepath)
+    size, mtime_ns = source_stat
+
+    inputs = {
+        "source": from_path,
+        "template": template.digest,
+        "basepath": basepath,
+        "version": GENERATOR_VERSION,
+    }
+    output_exists = os.path.exists(dest_path)
+    if (
+        cached is not None
+        and output_exists
+        and _same_inputs(cached, inputs)
+        and cached["size"] == size
+        and cached["mtime_ns"] == mtime_ns
+    ):
+        return "cached", cached
+
+    streamed = profile is None and size > STREAM_THRESHOLD
+    data = b""
+    if streamed:
+        # hashed in chunks, then read again line by line to convert
+        digest = file_digest(from_path)
+    elif profile is None:
+        with open(from_path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+    else:
+        with profile.phase("read"), open(from_path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+    entry = {**inputs, "size": size, "mtime_ns": mtime_ns, "sha256": digest}
+    if (
+        cached is not None
+        and output_exists
+        and _same_inputs(cached, inputs)
+        and cached["sha256"] == entry["sha256"]
+    ):
+        return "cached", entry
+
+    if streamed:
+        print(f"Streaming page from {from_path} to {dest_path} using {template_path}")
+        status = stream_page(from_path, template, dest_path, basepath)
+        return (None, None) if status is None else (status, entry)
 
+    if profile is None and body_cache is not None:
+        body = load_body(body_cache, entry["sha256"], GENERATOR_VERSION)
+        if body is not None:
+            # only the template or basepath changed: re-template, don't parse
+            title, parts = body
+            status = write_page(template, title, rebase(parts, basepath), dest_path)
+            return (None, None) if status is None else (status, entry)
 
-def generate_page(from_path: str, template_path: str, dest_path: str, basepath="/"):
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    markdown = data.decode("utf-8")
+    if profile is None and body_cache is not None and BASEPATH_SENTINEL not in markdown:
+        title, node = parse_page(markdown, BASEPATH_SENTINEL)
+        with BodyWriter(body_cache, digest, GENERATOR_VERSION, title) as writer:
+            body = writer.tee(node.iter_html(), basepath)
+            status = write_page(template, title, body, dest_path)
+            if status is None:
+                writer.discard()
+    elif profile is None:
+        title, node = parse_page(markdown, basepath)
+        status = write_page(template, title, node.iter_html(), dest_path)
+    else:
+        # profiled builds always parse, so every phase is measured
+        with profile.track_memory():
+            status = _build_profiled(data, template, dest_path, basepath, profile)
+    if status is None:
+        return None, None
+    return status, entry
+
+
+def _build_profiled(
+    data: bytes,
+    template: Template,
+    dest_path: str,
+    basepath: str,
+    profile: PageProfile,
+) -> str | None:
+    # the streaming path interleaves render, template and write; profiling
+    # runs them one after another so each phase can be timed on its own
+    title, node = parse_page(data.decode("utf-8"), basepath, profile)
+    with profile.phase("render"):
+        html = node.to_html()
+    with profile.phase("template"):
+        page = template.render(Title=escape_text(title), Content=html)
+    with profile.phase("write"):
+        return write_page(template, title, html, dest_path, rendered=page)
 
-    try:
-        with open(from_path, "r") as f:
-            markdown = f.read()
-        with open(template_path, "r") as f:
-            template = f.read()
-    except FileNotFoundError as e:
-        print(e)
-        return
 
-    html = markdown_to_html_node(markdown).to_html()
-    title = extract_title(markdown.strip("\n").split("\n")[0])
-    new_html = (
-        template.replace("{{ Title }}", title)
-        .replace("{{ Content }}", html)
-        .replace('href="/', f'href="{basepath}')
-        .replace('src="/', f'src="{basepath}')
-    )
+def stream_page(
+    from_path: str, template: Template, dest_path: str, basepath: str = "/"
+) -> str | None:
+    with open(from_path, "rb") as f:
+        title, body = stream_markdown(_source_lines(f), basepath)
+        if title is None:
+            raise Exception(MISSING_TITLE)
+        return write_page(template, title, body, dest_path)
 
+
+def parse_page(
+    markdown: str, basepath: str = "/", profile: PageProfile | None = None
+) -> tuple[str, HTMLNode]:
+    markdown = markdown.replace("\r\n", "\n").replace("\r", "\n")
+    document = parse_markdown(markdown, basepath, profile)
+    if document.title is None:
+        raise Exception(MISSING_TITLE)
+    return document.title, document.node
+
+
+def _source_lines(lines: Iterable[bytes]) -> Iterator[str]:
+    # binary lines split on "\n" only, and each one decodes on its own since
+    # "\n" never occurs inside a UTF-8 sequence; a lone "\r" still ends a
+    # line, as it does for the whole-file path
+    for line in lines:
+        text = line.decode("utf-8")
+        if "\r" not in text:
+            yield text
+            continue
+        *ended, rest = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        for piece in ended:
+            yield f"{piece}\n"
+        if rest:
+            yield rest
+
+
+def write_page(
+    template: Template,
+    title: str,
+    body: str | Iterable[str],
+    dest_path: str,
+    rendered: str | None = None,
+) -> str | None:
     if not os.path.exists(os.path.dirname(dest_path)):
         os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    if rendered is None:
+        chunks = template.iter_render(Title=escape_text(title), Content=body)
+    else:
+        chunks = [rendered]
     try:
-        with open(dest_path, "w") as f:
-            f.write(new_html)
+        return write_if_changed(dest_path, chunks)
     except FileNotFoundError as e:
         print(e)
-        return
+        return None
 
 
-def generate_pages_recursive(
-    dir_path_content, template_path, dest_dir_path, basepath="/"
-):
-    for item in os.listdir(dir_path_content):
-        print(f"dir_path_content: {dir_path_content}")
-        if os.path.isfile(os.path.join(dir_path_content, item)):
-            generate_page(
-                os.path.join(dir_path_content, item),
-                template_path,
-                os.path.join(dest_dir_path, item.replace(".md", ".html")),
-                basepath,
-            )
+def _same_inputs(cached: dict, inputs: dict) -> bool:
+    return all(cached.get(key) == value for key, value in inputs.items())
+
+
+def write_if_changed(path: str, chunks: Iterable[str]) -> str:
+    # stream into a sibling temp file, then keep whichever copy is current;
+    # an identical page leaves the existing file (and its mtime) untouched
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as f:
+            f.writelines(chunks)
+
+        if not os.path.exists(path):
+            status = "added"
+        elif _same_contents(tmp_path, path):
+            return "unchanged"
         else:
-            generate_pages_recursive(
-                os.path.join(dir_path_content, item),
-                template_path,
-                os.path.join(dest_dir_path, item),
-                basepath,
-            )
+            status = "changed"
+        os.replace(tmp_path, path)
+        return status
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _same_contents(path_a: str, path_b: str) -> bool:
+    if os.path.getsize(path_a) != os.path.getsize(path_b):
+        return False
+    with open(path_a, "rb") as a, open(path_b, "rb") as b:
+        while True:
+            chunk = a.read(WRITE_BUFFER)
+            if chunk != b.read(WRITE_BUFFER):
+                return False
+            if not chunk:
+                return True
+
+
+class BuildError(Exception):
+    def __init__(self, failures: list[tuple[str, str]], delta: Delta) -> None:
+        self.failures: list[tuple[str, str]] = failures
+        self.delta: Delta = delta
+        lines = [f"{len(failures)} page(s) failed to build:"]
+        lines.extend(f"  {source}: {error}" for source, error in failures)
+        super().__init__("\n".join(lines))
+
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath="/",
+    manifest_path=PAGES_MANIFEST,
+    jobs=1,
+    profiles: list[PageProfile] | None = None,
+    body_cache: str | None = None,
+) -> Delta:
+    if body_cache is None:
+        # rendered bodies live next to the page manifest
+        body_cache = os.path.join(os.path.dirname(manifest_path), "bodies")
+
+    old_manifest = load_manifest(manifest_path)
+    new_manifest: dict[str, dict] = {}
+    delta = Delta()
+    failures: list[tuple[str, str]] = []
+
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    page_jobs = [
+        (
+            page,
+            template_path,
+            basepath,
+            old_manifest.get(page.rel_path),
+            profiles is not None,
+            body_cache,
+        )
+        for page in pages
+    ]
+
+    for page, status, entry, error, profile in _run_jobs(page_jobs, jobs):
+        if profiles is not None and profile is not None:
+            profiles.append(profile)
+        if error is not None:
+            failures.append((page.source, error))
+        if error is not None or status is None or entry is None:
+            # keep the last good entry so its output is not pruned
+            if page.rel_path in old_manifest:
+                new_manifest[page.rel_path] = old_manifest[page.rel_path]
+            continue
+
+        new_manifest[page.rel_path] = entry
+        if status == "added":
+            delta.added.append(page.rel_path)
+        elif status == "changed":
+            delta.changed.append(page.rel_path)
+
+    for rel_path in sorted(old_manifest.keys() - new_manifest.keys()):
+        remove_file(dest_dir_path, rel_path)
+        delta.removed.append(rel_path)
+
+    save_manifest(manifest_path, new_manifest)
+    digests = {entry.get("sha256") for entry in new_manifest.values()}
+    prune_bodies(body_cache, digests)
+    if failures:
+        raise BuildError(sorted(failures), delta)
+    return delta
+
+
+def _run_jobs(page_jobs: list[tuple], jobs: int):
+    if jobs == 1 or len(page_jobs) <= 1:
+        for job in page_jobs:
+            yield _build_job(job)
+        return
+
+    # largest sources first, so a long page never ends up starting last
+    page_jobs = sorted(page_jobs, key=lambda job: job[0].size, reverse=True)
+    # each worker gets its own inline cache, sized like this process's
+    info = inline_cache_info()
+    with ProcessPoolExecutor(
+        max_workers=jobs or None,
+        initializer=set_inline_cache,
+        initargs=(0 if info is None else info.maxsize or 0,),
+    ) as executor:
+        futures = [executor.submit(_build_job, job) for job in page_jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _build_job(
+    job: tuple,
+) -> tuple[Page, str | None, dict | None, str | None, PageProfile | None]:
+    page, template_path, basepath, cached, profiled, body_cache = job
+    profile = None
+    if profiled:
+        # a cached page would have nothing to time, so profiling skips the
+        # page cache and builds every page
+        profile = PageProfile(page.source)
+        cached = None
+    try:
+        status, entry = build_page(
+            page.source,
+            template_path,
+            page.dest,
+            basepath,
+            cached,
+            (page.size, page.mtime_ns),
+            profile,
+            body_cache,
+        )
+    except Exception as e:
+        # report rather than raise, so one bad page does not stop the build
+        return page, None, None, f"{type(e).__name__}: {e}", None
+    return page, status, entry, None, profile
@@ -1,10 +1,50 @@
-from typing import override
+import sys
+from collections.abc import Iterator
+from typing import TextIO, override
 
 
 type Props = dict[str, str | None] | None
 
+# number of pieces iter_html gathers before handing a joined chunk over
+CHUNK_PIECES = 1024
+
+# "&" must come first so the entities themselves are not escaped again
+TEXT_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"))
+ATTRIBUTE_ESCAPES = TEXT_ESCAPES + (('"', "&quot;"),)
+
+
+def escape_text(text: str) -> str:
+    # a substring check per special character is a memchr; plain text (the
+    # common case) is returned as is without allocating anything
+    for char, entity in TEXT_ESCAPES:
+        if char in text:
+            text = text.replace(char, entity)
+    return text
+
+
+def escape_attribute(value: str) -> str:
+    for char, entity in ATTRIBUTE_ESCAPES:
+        if char in value:
+            value = value.replace(char, entity)
+    return value
+
+
+def render_props(props: Props) -> str:
+    if not props:
+        return ""
+
+    return "".join(
+        [
+            f' {prop}="{escape_attribute(value) if value else value}"'
+            for prop, value in props.items()
+        ]
+    )
+
 
 class HTMLNode:
+    # large pages create millions of nodes; slots keep each one free of a dict
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: str | None = None,
@@ -20,14 +60,14 @@ class HTMLNode:
     def to_html(self) -> str:
         raise NotImplementedError
 
-    def props_to_html(self) -> str:
-        html = ""
-        if self.props is None or len(self.props) == 0:
-            return ""
+    def iter_html(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def write_html(self, fp: TextIO) -> None:
+        fp.writelines(self.iter_html())
 
-        for prop in self.props:
-            html += f' {prop}="{self.props[prop]}"'
-        return html
+    def props_to_html(self) -> str:
+        return render_props(self.props)
 
     @override
     def __repr__(self) -> str:
@@ -35,6 +75,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str | None, value: str, props: Props = None):
         super().__init__(tag=tag, value=value, props=props)
 
@@ -44,9 +86,14 @@ class LeafNode(HTMLNode):
             raise ValueError("All leaf nodes must have a value")
 
         if self.tag is None:
-            return self.value
+            return escape_text(self.value)
+
+        value = escape_text(self.value)
+        return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
 
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+    @override
+    def iter_html(self) -> Iterator[str]:
+        yield self.to_html()
 
     @override
     def __repr__(self):
@@ -54,6 +101,8 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str,
@@ -64,14 +113,44 @@ class ParentNode(HTMLNode):
 
     @override
     def to_html(self) -> str:
-        if self.tag is None:
-            raise ValueError("All parent nodes must have a tag")
-
-        if self.children is None:
-            raise ValueError("All parent nodes must have children")
+        return "".join(_render(self, sys.maxsize))
 
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+    @override
+    def iter_html(self) -> Iterator[str]:
+        return _render(self, CHUNK_PIECES)
+
+
+def _render(root: HTMLNode, chunk_pieces: int) -> Iterator[str]:
+    # Walk the tree with an explicit stack of child iterators instead of
+    # recursing, appending every piece to one list that is joined when it
+    # grows past chunk_pieces. Each piece of output is copied once, however
+    # deeply it is nested.
+    pieces: list[str] = []
+    append = pieces.append
+    closing_tags: list[str] = []
+    iterators: list[Iterator[HTMLNode]] = [iter((root,))]
+    while iterators:
+        for node in iterators[-1]:
+            if isinstance(node, ParentNode):
+                if node.tag is None:
+                    raise ValueError("All parent nodes must have a tag")
+
+                if node.children is None:
+                    raise ValueError("All parent nodes must have children")
+
+                append(f"<{node.tag}{node.props_to_html()}>")
+                closing_tags.append(f"</{node.tag}>")
+                iterators.append(iter(node.children))
+                break
+            append(node.to_html())
+        else:
+            iterators.pop()
+            if closing_tags:
+                append(closing_tags.pop())
+
+        if len(pieces) >= chunk_pieces:
+            yield "".join(pieces)
+            pieces.clear()
+
+    if pieces:
+        yield "".join(pieces)
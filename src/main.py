@@ -1,32 +1,153 @@
+import argparse
+import json
 import os
 import shutil
 import sys
 
-from generate_html import generate_pages_recursive
+from assets import COPY_STRATEGIES, sync_directory
+from conversions import inline_cache_info, set_inline_cache
+from generate_html import BuildError, generate_pages_recursive
+from manifest import CACHE_DIR
+from profiling import PageProfile, format_slowest, write_report
+from watch import Watcher
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {number}")
+    return number
 
 
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+    parser = argparse.ArgumentParser(description="Build the static site into docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="wipe docs/ and the build manifests before building",
+    )
+    parser.add_argument(
+        "--copy-strategy",
+        choices=COPY_STRATEGIES,
+        default="auto",
+        help="how static assets are copied into docs/ (default: auto)",
+    )
+    parser.add_argument(
+        "--copy-workers",
+        type=positive_int,
+        default=None,
+        help="number of threads used to copy static assets",
+    )
+    parser.add_argument(
+        "--delta",
+        default=os.path.join(CACHE_DIR, "delta.json"),
+        help="where to write the list of added, changed and removed files",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=non_negative_int,
+        default=1,
+        help="number of processes used to build pages (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, keep polling for changes and rebuild what changed",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="REPORT",
+        help=(
+            "rebuild every page, timing each build phase, and write a JSON "
+            "report here"
+        ),
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        help="how many of the slowest pages to list (default: 10)",
+    )
+    parser.add_argument(
+        "--inline-cache",
+        type=int,
+        default=0,
+        metavar="SIZE",
+        help="memoize inline parsing of up to SIZE distinct strings (default: off)",
+    )
+    args = parser.parse_args()
+    set_inline_cache(args.inline_cache)
+
+    if args.clean:
+        if os.path.exists("docs"):
+            shutil.rmtree("docs")
+        if os.path.exists(CACHE_DIR):
+            shutil.rmtree(CACHE_DIR)
+
+    delta = sync_directory(
+        "static",
+        "docs",
+        strategy=args.copy_strategy,
+        workers=args.copy_workers,
+    )
+    failed = None
+    profiles: list[PageProfile] | None = [] if args.profile else None
+    try:
+        delta.extend(
+            generate_pages_recursive(
+                "content",
+                "template.html",
+                "docs",
+                args.basepath,
+                jobs=args.jobs,
+                profiles=profiles,
+            )
+        )
+    except BuildError as e:
+        delta.extend(e.delta)
+        failed = e
+
+    if profiles is not None:
+        write_report(args.profile, profiles, args.profile_top)
+        print(format_slowest(profiles, args.profile_top))
 
-    if os.path.exists("docs"):
-        shutil.rmtree("docs")
-    copy_directory("static", "docs")
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    print(
+        f"{len(delta.added)} added, {len(delta.changed)} changed, "
+        f"{len(delta.removed)} removed"
+    )
+    info = inline_cache_info()
+    if info is not None and args.jobs == 1:
+        # with several jobs each worker keeps its own counters
+        print(
+            f"inline cache: {info.hits} hits, {info.misses} misses, "
+            f"{info.currsize}/{info.maxsize} entries"
+        )
 
+    os.makedirs(os.path.dirname(args.delta) or ".", exist_ok=True)
+    with open(args.delta, "w") as f:
+        json.dump(delta.to_dict(), f, indent=2)
 
-def copy_directory(source: str, destination: str) -> None:
+    if failed is not None:
+        print(failed, file=sys.stderr)
 
-    if not os.path.exists(destination):
-        os.mkdir(destination)
+    if args.watch:
+        watcher = Watcher("content", "static", "template.html", "docs", args.basepath)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            return
 
-    for item in os.listdir(source):
-        source_item_path = os.path.join(source, item)
-        destination_item_path = os.path.join(destination, item)
-        if os.path.isdir(source_item_path):
-            copy_directory(source_item_path, destination_item_path)
-        else:
-            shutil.copy(source_item_path, destination_item_path)
-            print("item copied")
+    if failed is not None:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -1,60 +1,199 @@
-from blocks import BlockType, block_to_block_type
-from conversions import markdown_to_blocks, text_node_to_html_node, text_to_textnodes
+import itertools
+import time
+from collections.abc import Iterable, Iterator
+from typing import override
+
+from blocks import Block, BlockType, lex_blocks, lex_lines
+from conversions import parse_inline, text_node_to_html_node
 from htmlnode import HTMLNode, ParentNode
+from profiling import PageProfile
 from textnode import TextNode, TextType
 
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
+class Document:
+    def __init__(
+        self,
+        node: HTMLNode,
+        title: str | None,
+        outline: list[tuple[int, str]],
+        word_count: int,
+    ) -> None:
+        self.node: HTMLNode = node
+        self.title: str | None = title
+        self.outline: list[tuple[int, str]] = outline
+        self.word_count: int = word_count
+
+    @override
+    def __repr__(self) -> str:
+        return (
+            f"Document(title: {self.title}\noutline: {self.outline}\n"
+            f"word_count: {self.word_count})"
+        )
+
+
+def markdown_to_html_node(markdown: str, basepath: str = "/") -> HTMLNode:
+    return parse_markdown(markdown, basepath).node
+
+
+def parse_markdown(
+    markdown: str, basepath: str = "/", profile: PageProfile | None = None
+) -> Document:
+    if profile is None:
+        blocks: Iterable[Block] = lex_blocks(markdown)
+    else:
+        with profile.phase("blocks"):
+            blocks = list(lex_blocks(markdown))
+    return _build_document(blocks, basepath, profile)
+
+
+def parse_excerpt(
+    markdown: str,
+    basepath: str = "/",
+    max_blocks: int | None = 1,
+    max_chars: int | None = None,
+) -> Document:
+    # The title plus the first blocks after it, for listings and summaries.
+    # Blocks are lexed and parsed on demand, so the rest of the document is
+    # never looked at. max_chars counts source characters and never splits a
+    # block: the one that reaches the limit is the last one taken.
+    blocks = lex_blocks(markdown)
+    first = next(blocks, None)
+    if first is None:
+        return Document(ParentNode("div", []), None, [], 0)
+
+    title = _title(first)
+    if title is None:
+        blocks = itertools.chain((first,), blocks)
+    document = _build_document(_take(blocks, max_blocks, max_chars), basepath)
+    document.title = title
+    return document
+
+
+def _take(
+    blocks: Iterator[Block], max_blocks: int | None, max_chars: int | None
+) -> Iterator[Block]:
+    taken = chars = 0
+    while max_blocks is None or taken < max_blocks:
+        if max_chars is not None and chars >= max_chars:
+            return
+        block = next(blocks, None)
+        if block is None:
+            return
+        yield block
+        taken += 1
+        chars += block.end - block.start
+
+
+def _title(block: Block) -> str | None:
+    # the title is the first line of a leading "# " heading
+    if block.block_type != BlockType.HEADING or not block.text.startswith("# "):
+        return None
+    return block.text.split(" ", 1)[1].partition("\n")[0].strip().strip("# ")
+
+
+def _build_document(
+    blocks: Iterable[Block], basepath: str = "/", profile: PageProfile | None = None
+) -> Document:
     html_nodes = []
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        match block_type:
-            case BlockType.PARAGRAPH:
-                children = text_to_children(block.replace("\n", " "))
-                html_node = ParentNode("p", children)
-                html_nodes.append(html_node)
-            case BlockType.HEADING:
-                prefix, rest = block.split(" ", 1)
-                level = len(prefix)
-                text = rest.strip()
-                children = text_to_children(text)
-                html_nodes.append(ParentNode(f"h{level}", children))
-            case BlockType.CODE:
-                lines = block.strip("\n").split("\n")
-                code_text = "\n".join(lines[1:-1])
-                code_text += "\n"
-                code_html = text_node_to_html_node(TextNode(code_text, TextType.CODE))
-                html_nodes.append(ParentNode("pre", [code_html]))
-            case BlockType.QUOTE:
-                lines = block.strip("\n").split("\n")
-                quote_text = []
-                for line in lines:
-                    quote_text.append(line.strip(">").strip())
-
-                text = " ".join(quote_text)
-                children = text_to_children(text)
-                html_node = ParentNode("blockquote", children)
-                html_nodes.append(html_node)
-            case BlockType.UNORDERED_LIST:
-                lines = block.split("\n")
-                li_nodes = []
-                for line in lines:
-                    item_text = line[2:]
-                    li_nodes.append(ParentNode("li", text_to_children(item_text)))
-                html_nodes.append(ParentNode("ul", li_nodes))
-            case BlockType.ORDERED_LIST:
-                lines = block.split("\n")
-                li_nodes = []
-                for line in lines:
-                    _, item_text = line.split(". ", 1)
-                    li_nodes.append(ParentNode("li", text_to_children(item_text)))
-                html_nodes.append(ParentNode("ol", li_nodes))
-
-    return ParentNode("div", html_nodes)
-
-
-def text_to_children(text: str) -> list[HTMLNode]:
-    text_nodes = text_to_textnodes(text.strip("\n"))
-    children = list(map(text_node_to_html_node, text_nodes))
+    title = None
+    outline: list[tuple[int, str]] = []
+    word_count = 0
+    for index, block in enumerate(blocks):
+        html_node, words = block_to_html_node(block, basepath, profile)
+        html_nodes.append(html_node)
+        word_count += words
+        if block.block_type == BlockType.HEADING:
+            outline.append(_heading(block))
+            if index == 0:
+                title = _title(block)
+
+    return Document(ParentNode("div", html_nodes), title, outline, word_count)
+
+
+def stream_markdown(
+    lines: Iterable[str], basepath: str = "/"
+) -> tuple[str | None, Iterator[str]]:
+    # Convert one block at a time: only the block being converted, and its
+    # nodes, are in memory. The title comes from the first block, so it is
+    # known before any of the body has to be written.
+    blocks = lex_lines(lines)
+    first = next(blocks, None)
+    title = None if first is None else _title(first)
+    return title, _stream_blocks(first, blocks, basepath)
+
+
+def _stream_blocks(
+    first: Block | None, blocks: Iterator[Block], basepath: str
+) -> Iterator[str]:
+    yield "<div>"
+    if first is not None:
+        for block in itertools.chain((first,), blocks):
+            html_node, _ = block_to_html_node(block, basepath)
+            yield from html_node.iter_html()
+    yield "</div>"
+
+
+def block_to_html_node(
+    block: Block, basepath: str = "/", profile: PageProfile | None = None
+) -> tuple[HTMLNode, int]:
+    # the node for one block, and the number of words in it
+    source = block.source
+    match block.block_type:
+        case BlockType.PARAGRAPH:
+            text = block.text
+            children = text_to_children(text.replace("\n", " "), basepath, profile)
+            return ParentNode("p", children), len(text.split())
+        case BlockType.HEADING:
+            level, text = _heading(block)
+            children = text_to_children(text, basepath, profile)
+            return ParentNode(f"h{level}", children), len(text.split())
+        case BlockType.CODE:
+            lines = block.lines()
+            # everything between the fence lines, sliced straight out of
+            # the source
+            code_text = source[lines[1][0] : lines[-2][1]] if len(lines) > 2 else ""
+            code_text += "\n"
+            code_html = text_node_to_html_node(TextNode(code_text, TextType.CODE))
+            return ParentNode("pre", [code_html]), len(code_text.split())
+        case BlockType.QUOTE:
+            lines = block.lines()
+            text = " ".join(
+                [source[start:end].strip(">").strip() for start, end in lines]
+            )
+            children = text_to_children(text, basepath, profile)
+            return ParentNode("blockquote", children), len(text.split())
+        case BlockType.UNORDERED_LIST:
+            lines = block.lines()
+            li_nodes: list[HTMLNode] = []
+            for start, end in lines:
+                item_text = source[start + 2 : end]
+                li_nodes.append(
+                    ParentNode("li", text_to_children(item_text, basepath, profile))
+                )
+            # every line starts with a marker that is not a word
+            return ParentNode("ul", li_nodes), len(block.text.split()) - len(lines)
+        case BlockType.ORDERED_LIST:
+            lines = block.lines()
+            li_nodes = []
+            for start, end in lines:
+                _, item_text = source[start:end].split(". ", 1)
+                li_nodes.append(
+                    ParentNode("li", text_to_children(item_text, basepath, profile))
+                )
+            return ParentNode("ol", li_nodes), len(block.text.split()) - len(lines)
+
+
+def _heading(block: Block) -> tuple[int, str]:
+    prefix, rest = block.text.split(" ", 1)
+    return len(prefix), rest.strip()
+
+
+def text_to_children(
+    text: str, basepath: str = "/", profile: PageProfile | None = None
+) -> list[HTMLNode]:
+    start = time.perf_counter_ns() if profile is not None else 0
+    text_nodes = parse_inline(text.strip("\n"))
+    children = [text_node_to_html_node(node, basepath) for node in text_nodes]
+    if profile is not None:
+        profile.add("inline", time.perf_counter_ns() - start)
     return children  # pyright: ignore[reportReturnType]
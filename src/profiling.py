@@ -0,0 +1,104 @@
+import json
+import os
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import override
+
+PHASES = ("read", "blocks", "inline", "render", "template", "write")
+
+
+class PageProfile:
+    def __init__(self, source: str) -> None:
+        self.source: str = source
+        self.phases: dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.peak_memory: int = 0
+
+    def add(self, phase: str, elapsed_ns: int) -> None:
+        self.phases[phase] += elapsed_ns
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter_ns() - start
+
+    @contextmanager
+    def track_memory(self) -> Iterator[None]:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            self.peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+            if started:
+                tracemalloc.stop()
+
+    @property
+    def total_ns(self) -> int:
+        return sum(self.phases.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "total_ms": _ms(self.total_ns),
+            "phases_ms": {name: _ms(ns) for name, ns in self.phases.items()},
+            "peak_memory_bytes": self.peak_memory,
+        }
+
+    @override
+    def __repr__(self) -> str:
+        return f"PageProfile(source: {self.source}\ntotal_ms: {_ms(self.total_ns)})"
+
+
+def slowest(profiles: list[PageProfile], top: int = 10) -> list[PageProfile]:
+    return sorted(profiles, key=lambda profile: profile.total_ns, reverse=True)[:top]
+
+
+def build_report(profiles: list[PageProfile], top: int = 10) -> dict:
+    totals = dict.fromkeys(PHASES, 0)
+    for profile in profiles:
+        for name, ns in profile.phases.items():
+            totals[name] += ns
+
+    return {
+        "pages": len(profiles),
+        "total_ms": _ms(sum(totals.values())),
+        "phases_ms": {name: _ms(ns) for name, ns in totals.items()},
+        "max_peak_memory_bytes": max(
+            (profile.peak_memory for profile in profiles), default=0
+        ),
+        "slowest": [profile.to_dict() for profile in slowest(profiles, top)],
+        "all": [
+            profile.to_dict()
+            for profile in sorted(profiles, key=lambda profile: profile.source)
+        ],
+    }
+
+
+def write_report(path: str, profiles: list[PageProfile], top: int = 10) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(build_report(profiles, top), f, indent=2)
+
+
+def format_slowest(profiles: list[PageProfile], top: int = 10) -> str:
+    lines = [f"Slowest {min(top, len(profiles))} of {len(profiles)} page(s):"]
+    for profile in slowest(profiles, top):
+        busiest = max(profile.phases, key=lambda name: profile.phases[name])
+        lines.append(
+            f"  {_ms(profile.total_ns):>10.3f}ms  "
+            f"{profile.peak_memory / 1024:>10.1f}KiB  "
+            f"{busiest:<8}  {profile.source}"
+        )
+    return "\n".join(lines)
+
+
+def _ms(ns: int) -> float:
+    return round(ns / 1_000_000, 3)
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import re
+from collections.abc import Iterable, Iterator
+
+SLOT_PATTERN = re.compile(r"{{\s*(\w+)\s*}}")
+DIRECTIVE_PATTERN = re.compile(
+    r'{{\s*(include|extends|block|endblock)(?:\s+(?:"([^"]+)"|(\w+)))?\s*}}'
+)
+
+type Stats = tuple[tuple[str, int, int], ...]
+# a parsed template file: literal text, ("include", path) and
+# ("block", name, nodes) entries in document order
+type Nodes = list[str | tuple]
+
+_cache: dict[tuple[str, str], tuple[Stats, "Template"]] = {}
+_fragments: dict[str, tuple[str, "Fragment"]] = {}
+
+
+class Template:
+    def __init__(
+        self, source: str, basepath: str = "/", files: list[str] | None = None
+    ) -> None:
+        # source has its includes and layout already expanded, so the digest
+        # changes whenever any partial does
+        self.digest: str = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        self.files: list[str] = files or []
+        self.literals: list[str] = []
+        self.slots: list[tuple[str, str]] = []
+
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.literals.append(_rebase(source[position : match.start()], basepath))
+            self.slots.append((match.group(1), match.group(0)))
+            position = match.end()
+        self.literals.append(_rebase(source[position:], basepath))
+
+    def render(self, **values: str) -> str:
+        parts = [self.literals[0]]
+        for (name, placeholder), literal in zip(self.slots, self.literals[1:]):
+            # unknown slots are left in place, like the old str.replace chain
+            parts.append(values.get(name, placeholder))
+            parts.append(literal)
+        return "".join(parts)
+
+    def iter_render(self, **values: str | Iterable[str]) -> Iterator[str]:
+        yield self.literals[0]
+        for (name, placeholder), literal in zip(self.slots, self.literals[1:]):
+            value = values.get(name, placeholder)
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+            yield literal
+
+
+class Fragment:
+    def __init__(self, source: str, path: str) -> None:
+        self.path: str = path
+        self.extends: str | None = None
+        self.nodes: Nodes = []
+        self.blocks: dict[str, Nodes] = {}
+
+        directory = os.path.dirname(path)
+        stack: list[tuple[str, Nodes]] = []
+        nodes = self.nodes
+        position = 0
+        for match in DIRECTIVE_PATTERN.finditer(source):
+            if match.start() > position:
+                nodes.append(source[position : match.start()])
+            position = match.end()
+            directive, target, name = match.groups()
+            if directive == "include" and target is not None:
+                nodes.append(("include", os.path.join(directory, target)))
+            elif directive == "extends" and target is not None:
+                if self.extends is not None or stack:
+                    raise ValueError(
+                        f"{path}: extends must appear once, outside blocks"
+                    )
+                self.extends = os.path.join(directory, target)
+            elif directive == "block" and name is not None:
+                stack.append((name, nodes))
+                nodes = []
+            elif directive == "endblock" and stack:
+                name, parent = stack.pop()
+                if name in self.blocks:
+                    raise ValueError(f"{path}: block {name} is defined twice")
+                self.blocks[name] = nodes
+                parent.append(("block", name, nodes))
+                nodes = parent
+            else:
+                raise ValueError(f"{path}: invalid directive {match.group(0)}")
+        if stack:
+            raise ValueError(f"{path}: block {stack[-1][0]} is never closed")
+        if position < len(source):
+            nodes.append(source[position:])
+
+
+def load_template(path: str, basepath: str = "/") -> Template:
+    key = (path, basepath)
+    cached = _cache.get(key)
+    if cached is not None and _unchanged(cached[0]):
+        return cached[1]
+
+    files: list[str] = []
+    source = _expand(path, {}, files, ())
+    template = Template(source, basepath, files)
+    _cache[key] = (_stats(files), template)
+    return template
+
+
+def load_fragment(path: str) -> Fragment:
+    # compiled once per file content: an unchanged file (by hash) reuses the
+    # parse from any earlier load, whichever template included it
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    cached = _fragments.get(path)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+    # match the newline translation of reading the file in text mode
+    source = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    fragment = Fragment(source, path)
+    _fragments[path] = (digest, fragment)
+    return fragment
+
+
+def _expand(
+    path: str, overrides: dict[str, Nodes], files: list[str], seen: tuple[str, ...]
+) -> str:
+    if path in seen:
+        raise ValueError(f"template cycle: {' -> '.join(seen + (path,))}")
+    seen += (path,)
+    fragment = load_fragment(path)
+    if path not in files:
+        files.append(path)
+    if fragment.extends is not None:
+        # the nearest child's blocks win over the layout's own
+        blocks = {**fragment.blocks, **overrides}
+        return _expand(fragment.extends, blocks, files, seen)
+    return _render_nodes(fragment.nodes, overrides, files, seen)
+
+
+def _render_nodes(
+    nodes: Nodes, overrides: dict[str, Nodes], files: list[str], seen: tuple[str, ...]
+) -> str:
+    parts: list[str] = []
+    for node in nodes:
+        if isinstance(node, str):
+            parts.append(node)
+        elif node[0] == "include":
+            parts.append(_expand(node[1], overrides, files, seen))
+        else:
+            block = overrides.get(node[1], node[2])
+            parts.append(_render_nodes(block, overrides, files, seen))
+    return "".join(parts)
+
+
+def _unchanged(stats: Stats) -> bool:
+    try:
+        return _stats(path for path, _, _ in stats) == stats
+    except FileNotFoundError:
+        return False
+
+
+def _stats(paths: Iterable[str]) -> Stats:
+    stats = []
+    for path in paths:
+        stat = os.stat(path)
+        stats.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(stats)
+
+
+def _rebase(html: str, basepath: str) -> str:
+    if basepath == "/":
+        return html
+    return html.replace('href="/', f'href="{basepath}').replace(
+        'src="/', f'src="{basepath}'
+    )
@@ -0,0 +1,187 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from assets import (
+    COPY_STRATEGIES,
+    copy_directory,
+    copy_file,
+    sync_directory,
+    walk_files,
+)
+
+
+def write(path: str, data: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(data)
+
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.destination = os.path.join(self.tmp.name, "docs")
+        self.manifest = os.path.join(self.tmp.name, ".cache", "static.json")
+        write(os.path.join(self.source, "index.css"), "body {}")
+        write(os.path.join(self.source, "images", "a.png"), "aaaa")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync(self):
+        return sync_directory(self.source, self.destination, self.manifest)
+
+    def test_first_sync_adds_every_file(self):
+        delta = self.sync()
+
+        self.assertEqual(
+            delta.to_dict(),
+            {"added": ["images/a.png", "index.css"], "changed": [], "removed": []},
+        )
+        self.assertEqual(walk_files(self.destination), ["images/a.png", "index.css"])
+
+    def test_second_sync_leaves_untouched_files_alone(self):
+        self.sync()
+        dest_css = os.path.join(self.destination, "index.css")
+        os.utime(dest_css, ns=(1, 1))
+
+        delta = self.sync()
+
+        self.assertEqual(
+            delta.to_dict(), {"added": [], "changed": [], "removed": []}
+        )
+        self.assertEqual(os.stat(dest_css).st_mtime_ns, 1)
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        write(os.path.join(self.source, "index.css"), "body { color: red; }")
+
+        delta = self.sync()
+
+        self.assertEqual(delta.changed, ["index.css"])
+        with open(os.path.join(self.destination, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red; }")
+
+    def test_touched_but_identical_file_is_not_copied(self):
+        self.sync()
+        os.utime(os.path.join(self.source, "index.css"), ns=(5, 5))
+
+        delta = self.sync()
+
+        self.assertEqual(delta.changed, [])
+
+    def test_identical_destination_without_manifest_is_not_copied(self):
+        self.sync()
+        os.remove(self.manifest)
+        write(os.path.join(self.destination, "index.css"), "body {!")
+        dest_png = os.path.join(self.destination, "images", "a.png")
+        os.utime(dest_png, ns=(1, 1))
+
+        delta = self.sync()
+
+        self.assertEqual(delta.to_dict()["changed"], ["index.css"])
+        self.assertEqual(os.stat(dest_png).st_mtime_ns, 1)
+
+    def test_orphans_are_removed(self):
+        self.sync()
+        os.remove(os.path.join(self.source, "images", "a.png"))
+
+        delta = self.sync()
+
+        self.assertEqual(delta.removed, ["images/a.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.destination, "images")))
+
+    def test_files_not_in_manifest_are_kept(self):
+        write(os.path.join(self.destination, "index.html"), "<html></html>")
+
+        self.sync()
+        os.remove(os.path.join(self.source, "index.css"))
+        self.sync()
+
+        self.assertEqual(walk_files(self.destination), ["images/a.png", "index.html"])
+
+
+class TestCopyFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "source.bin")
+        with open(self.source, "wb") as f:
+            f.write(os.urandom(3 * 1024 * 1024 + 17))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_every_strategy_produces_identical_copy(self):
+        for strategy in COPY_STRATEGIES:
+            destination = os.path.join(self.tmp.name, f"{strategy}.bin")
+            copy_file(self.source, destination, strategy)
+            self.assertEqual(self.read(self.source), self.read(destination), strategy)
+
+    def test_hardlink_shares_the_source_inode(self):
+        destination = os.path.join(self.tmp.name, "linked.bin")
+
+        self.assertEqual(copy_file(self.source, destination, "hardlink"), "hardlink")
+        self.assertTrue(os.path.samefile(self.source, destination))
+
+    def test_copy_over_hardlink_does_not_truncate_source(self):
+        destination = os.path.join(self.tmp.name, "linked.bin")
+        expected = self.read(self.source)
+        copy_file(self.source, destination, "hardlink")
+
+        copy_file(self.source, destination, "buffered")
+
+        self.assertFalse(os.path.samefile(self.source, destination))
+        self.assertEqual(self.read(self.source), expected)
+
+    def test_failed_copy_leaves_no_temp_file(self):
+        destination = os.path.join(self.tmp.name, "failed.bin")
+
+        with mock.patch.object(shutil, "copyfileobj", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                copy_file(self.source, destination, "buffered")
+
+        self.assertFalse(os.path.exists(f"{destination}.copy-tmp"))
+        self.assertFalse(os.path.exists(destination))
+
+    def test_unknown_strategy_raises(self):
+        with self.assertRaises(ValueError):
+            copy_directory(self.tmp.name, os.path.join(self.tmp.name, "out"), "magic")
+
+
+class TestCopyDirectory(unittest.TestCase):
+    def test_copies_nested_tree_in_parallel(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "static")
+            destination = os.path.join(tmp, "docs")
+            expected = [f"dir{i % 3}/file{i}.txt" for i in range(20)]
+            for rel_path in expected:
+                write(os.path.join(source, rel_path), rel_path)
+
+            copy_directory(source, destination, workers=4)
+
+            self.assertEqual(walk_files(destination), sorted(expected))
+            with open(os.path.join(destination, "dir1/file4.txt")) as f:
+                self.assertEqual(f.read(), "dir1/file4.txt")
+
+    def test_workers_below_one_copy_serially(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "static")
+            for i in range(3):
+                write(os.path.join(source, f"file{i}.txt"), str(i))
+
+            for workers in (0, -2):
+                destination = os.path.join(tmp, f"docs{workers}")
+                copy_directory(source, destination, workers=workers)
+
+                self.assertEqual(len(walk_files(destination)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pyright: ignore[reportUnusedCallResult]
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import generate_html
+from bench import CorpusConfig, compare, generate_corpus, run_benchmarks
+from markdown_to_html import parse_markdown
+
+
+class TestCorpus(unittest.TestCase):
+    def test_corpus_is_deterministic_and_parses(self):
+        config = CorpusConfig(pages=3, blocks_per_page=30, seed=7)
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            paths_a = generate_corpus(a, config)
+            paths_b = generate_corpus(b, config)
+
+            for path_a, path_b in zip(paths_a, paths_b):
+                with open(path_a) as fa, open(path_b) as fb:
+                    markdown = fa.read()
+                    self.assertEqual(markdown, fb.read())
+                self.assertIsNotNone(parse_markdown(markdown).title)
+
+    def test_densities_shape_the_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = CorpusConfig(
+                pages=1, blocks_per_page=50, list_density=1.0, inline_density=0.0
+            )
+            (path,) = generate_corpus(tmp, config)
+            with open(path) as f:
+                markdown = f.read()
+
+        self.assertNotIn("**", markdown)
+        self.assertNotIn("> ", markdown)
+        self.assertTrue(os.path.basename(os.path.dirname(path)).startswith("page"))
+
+
+class TestRunBenchmarks(unittest.TestCase):
+    def test_results_cover_every_stage(self):
+        results = run_benchmarks(CorpusConfig(pages=2, blocks_per_page=5), repeat=1)
+
+        self.assertEqual(
+            sorted(results["results"]),
+            [
+                "FlatDocument.to_html",
+                "ParentNode.to_html",
+                "block_to_block_type",
+                "generate_pages_recursive",
+                "markdown_to_blocks",
+                "text_to_textnodes",
+            ],
+        )
+        self.assertEqual(results["config"]["pages"], 2)
+        self.assertGreater(results["html_tree_bytes"], 0)
+        self.assertGreater(results["flat_document_bytes"], 0)
+
+    def test_every_build_run_is_cold(self):
+        with mock.patch.object(
+            generate_html, "parse_page", wraps=generate_html.parse_page
+        ) as parse_page:
+            run_benchmarks(CorpusConfig(pages=2, blocks_per_page=5), repeat=3)
+
+        # no run may reuse the pages or bodies cached by an earlier one
+        self.assertEqual(parse_page.call_count, 2 * 3)
+
+    def test_compare_reports_regressions_over_threshold(self):
+        baseline = {"results": {"a": {"min_ms": 10.0}, "b": {"min_ms": 10.0}}}
+        current = {
+            "results": {
+                "a": {"min_ms": 10.5},
+                "b": {"min_ms": 13.0},
+                "c": {"min_ms": 1.0},
+            }
+        }
+
+        self.assertEqual(
+            compare(baseline, current, 0.1), ["b: 10.0ms -> 13.0ms (+30%)"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()  # pyright: ignore[reportUnusedCallResult]
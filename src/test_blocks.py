@@ -1,5 +1,5 @@
 import unittest
-from blocks import BlockType, block_to_block_type
+from blocks import BlockType, block_to_block_type, lex_blocks
 
 
 class TestBlockToBlockType(unittest.TestCase):
@@ -98,3 +98,49 @@ and even more normal text
         self.assertEqual(
             BlockType.PARAGRAPH, block_to_block_type(block), f"\nblock: {block}"
         )
+
+
+class TestLexBlocks(unittest.TestCase):
+    def test_blocks_are_typed_spans_of_the_source(self):
+        md = """
+# Title
+
+ Some **text**
+over two lines 
+
+```
+code
+```
+
+
+
+- one
+- two
+"""
+        blocks = list(lex_blocks(md))
+
+        self.assertEqual(
+            [block.block_type for block in blocks],
+            [
+                BlockType.HEADING,
+                BlockType.PARAGRAPH,
+                BlockType.CODE,
+                BlockType.UNORDERED_LIST,
+            ],
+        )
+        for block in blocks:
+            self.assertIs(block.source, md)
+            self.assertEqual(md[block.start : block.end], block.text)
+        self.assertEqual(blocks[1].text, "Some **text**\nover two lines")
+        self.assertEqual(
+            [md[start:end] for start, end in blocks[2].lines()], ["```", "code", "```"]
+        )
+        self.assertEqual(blocks[3].lines()[1], (md.index("- two"), len(md) - 1))
+
+    def test_only_the_first_line_is_classified(self):
+        (block,) = lex_blocks("> quote\nnot a quote")
+
+        self.assertEqual(block.block_type, BlockType.QUOTE)
+
+    def test_whitespace_only_blocks_are_dropped(self):
+        self.assertEqual(list(lex_blocks("\n\n  \n\n\t")), [])
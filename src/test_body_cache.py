@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from body_cache import BASEPATH_SENTINEL, BodyWriter, load_body
+
+
+class TestBodyWriter(unittest.TestCase):
+    def test_tee_streams_the_body_and_caches_its_parts(self):
+        sentinel = BASEPATH_SENTINEL
+        chunks = [f'<a href="{sentinel}x">"q"</a>\n', f"<p>{sentinel}"]
+        with tempfile.TemporaryDirectory() as tmp:
+            with BodyWriter(tmp, "abc", 3, "Té") as writer:
+                html = "".join(writer.tee(chunks, "/blog/"))
+
+            self.assertEqual(html, '<a href="/blog/x">"q"</a>\n<p>/blog/')
+            self.assertEqual(
+                load_body(tmp, "abc", 3),
+                ("Té", ['<a href="', 'x">"q"</a>\n<p>', ""]),
+            )
+            self.assertEqual(os.listdir(tmp), ["abc.json"])
+
+    def test_unfinished_stream_is_not_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with BodyWriter(tmp, "abc", 3, "T") as writer:
+                next(writer.tee(iter(["a", "b"]), "/"))
+
+            self.assertIsNone(load_body(tmp, "abc", 3))
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_writers_for_the_same_digest_do_not_collide(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with BodyWriter(tmp, "abc", 3, "T") as first:
+                with BodyWriter(tmp, "abc", 3, "T") as second:
+                    "".join(second.tee(["b"], "/"))
+                "".join(first.tee(["a"], "/"))
+
+            self.assertEqual(load_body(tmp, "abc", 3), ("T", ["a"]))
+
+    def test_unwritable_cache_does_not_fail(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "file")
+            with open(cache_dir, "w") as f:
+                f.write("not a directory")
+
+            with BodyWriter(cache_dir, "abc", 3, "T") as writer:
+                html = "".join(writer.tee(["a", "b"], "/"))
+
+            self.assertEqual(html, "ab")
+
+
+if __name__ == "__main__":
+    unittest.main()  # pyright: ignore[reportUnusedCallResult]
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from content import collect_pages, page_for
+
+
+class TestCollectPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path: str, data: str) -> None:
+        path = os.path.join(self.content, rel_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write(data)
+
+    def test_manifest_is_sorted_and_maps_destinations(self):
+        self.write("index.md", "# Home")
+        self.write("blog/tom/index.md", "# Tom")
+        self.write("about.md", "# About")
+
+        pages = collect_pages(self.content, "docs")
+
+        self.assertEqual(
+            [(page.rel_path, page.dest) for page in pages],
+            [
+                ("about.html", "docs/about.html"),
+                ("blog/tom/index.html", "docs/blog/tom/index.html"),
+                ("index.html", "docs/index.html"),
+            ],
+        )
+        self.assertEqual(pages[0].source, os.path.join(self.content, "about.md"))
+        self.assertEqual(pages[0].size, len("# About"))
+
+    def test_page_for_matches_collect_pages(self):
+        self.write("index.md", "# Home")
+        self.write("blog/tom/index.md", "# Tom")
+
+        for page in collect_pages(self.content, "docs"):
+            self.assertEqual(
+                page_for(page.source, self.content, "docs", page.size, page.mtime_ns),
+                page,
+            )
+
+    def test_deep_trees_do_not_hit_the_recursion_limit(self):
+        # os.makedirs recurses itself, so build the tree one level at a time
+        rel_dir = os.path.join(*(["d"] * 1100))
+        path = self.content
+        os.mkdir(path)
+        try:
+            try:
+                for _ in range(1100):
+                    path = os.path.join(path, "d")
+                    os.mkdir(path)
+            except OSError:
+                path = os.path.dirname(path)
+                self.skipTest("filesystem does not allow paths this deep")
+            self.write(os.path.join(rel_dir, "index.md"), "# Deep")
+
+            pages = collect_pages(self.content, "docs")
+
+            self.assertEqual(len(pages), 1)
+            self.assertEqual(pages[0].rel_path, os.path.join(rel_dir, "index.html"))
+        finally:
+            # shutil.rmtree recurses on Python 3.12, so tearDown could not
+            # remove a tree this deep; take it down one level at a time
+            index = os.path.join(path, "index.md")
+            if os.path.exists(index):
+                os.remove(index)
+            while path != self.content:
+                os.rmdir(path)
+                path = os.path.dirname(path)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pyright: ignore[reportUnusedCallResult]
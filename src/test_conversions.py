@@ -3,7 +3,11 @@ import unittest
 from conversions import (
     extract_markdown_images,
     extract_markdown_links,
+    inline_cache_info,
     markdown_to_blocks,
+    parse_inline,
+    resolve_url,
+    set_inline_cache,
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
@@ -59,6 +63,35 @@ class TestTextNodeToHtml(unittest.TestCase):
             f'<img src="{url}" alt="{text}"></img>',
         )
 
+    def test_text_node_to_html_node_link_with_basepath(self):
+        text_node = TextNode("home", TextType.LINK, "/blog/tom")
+
+        self.assertEqual(
+            text_node_to_html_node(text_node, "/tonytalks/").to_html(),
+            '<a href="/tonytalks/blog/tom">home</a>',
+        )
+
+    def test_text_node_to_html_node_image_with_basepath(self):
+        text_node = TextNode("tom", TextType.IMAGE, "/images/tom.png")
+
+        self.assertEqual(
+            text_node_to_html_node(text_node, "/tonytalks/").to_html(),
+            '<img src="/tonytalks/images/tom.png" alt="tom"></img>',
+        )
+
+
+class TestResolveUrl(unittest.TestCase):
+    def test_root_relative_url_is_prefixed(self):
+        self.assertEqual(resolve_url("/", "/tonytalks/"), "/tonytalks/")
+        self.assertEqual(resolve_url("/a/b", "/tonytalks/"), "/tonytalks/a/b")
+
+    def test_other_urls_are_left_alone(self):
+        for url in ["https://boot.dev", "images/a.png", "//cdn.com/a.js", None]:
+            self.assertEqual(resolve_url(url, "/tonytalks/"), url)
+
+    def test_default_basepath_is_a_no_op(self):
+        self.assertEqual(resolve_url("/a", "/"), "/a")
+
 
 class TestSplitNodesDelimiter(unittest.TestCase):
     def test_split_nodes_delimiter_inline_bold(self):
@@ -339,6 +372,20 @@ class TestSplitNodesImage(unittest.TestCase):
         )
 
 
+    def test_split_images_repeated_image(self):
+        node = TextNode("![a](/a.png) and ![a](/a.png) again", TextType.TEXT)
+
+        self.assertListEqual(
+            [
+                TextNode("a", TextType.IMAGE, "/a.png"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("a", TextType.IMAGE, "/a.png"),
+                TextNode(" again", TextType.TEXT),
+            ],
+            split_nodes_image([node]),
+        )
+
+
 class TestSplitNodesLink(unittest.TestCase):
     def test_split_nodes_link_with_one_link_in_one_node(self):
         src = "test link"
@@ -464,6 +511,30 @@ class TestSplitNodesLink(unittest.TestCase):
         )
 
 
+    def test_split_links_many_links(self):
+        text = " ".join(f"[{i}](/{i})" for i in range(1000))
+
+        new_nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+
+        self.assertEqual(len(new_nodes), 1999)
+        self.assertEqual(new_nodes[-1], TextNode("999", TextType.LINK, "/999"))
+        self.assertEqual(new_nodes[1], TextNode(" ", TextType.TEXT))
+
+
+class ScanCountingStr(str):
+    # counts the characters find() looks at before it returns
+    scanned = 0
+
+    def find(self, sub, start=None, end=None):
+        position = super().find(sub, start, end)
+        start = 0 if start is None else start
+        stop = len(self) if end is None else min(end, len(self))
+        ScanCountingStr.scanned += (
+            stop - start if position == -1 else position + len(sub) - start
+        )
+        return position
+
+
 class TestTextToTextNodes(unittest.TestCase):
     def test_text_to_text_nodes_with_multiple_text_types(self):
         text = "this is **some** example _text_ with an ![image](https://www.image.com), `some code` and even a [link](https://www.link.com)"
@@ -507,6 +578,62 @@ class TestTextToTextNodes(unittest.TestCase):
             text_to_textnodes(text),
         )
 
+    def test_text_to_text_nodes_with_empty_text(self):
+        self.assertEqual(text_to_textnodes(""), [])
+
+    def test_text_to_text_nodes_does_not_parse_inside_spans(self):
+        text = "**bold _not italic_** and _italic `not code`_ and `[no](link)`"
+
+        self.assertEqual(
+            [
+                TextNode("bold _not italic_", TextType.BOLD),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("italic `not code`", TextType.ITALIC),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("[no](link)", TextType.CODE),
+            ],
+            text_to_textnodes(text),
+        )
+
+    def test_text_to_text_nodes_keeps_text_after_repeated_links(self):
+        text = "[a](/a) or [a](/a) twice"
+
+        self.assertEqual(
+            [
+                TextNode("a", TextType.LINK, "/a"),
+                TextNode(" or ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "/a"),
+                TextNode(" twice", TextType.TEXT),
+            ],
+            text_to_textnodes(text),
+        )
+
+    def test_text_to_text_nodes_scans_many_spans_in_linear_time(self):
+        for span in ("_a_ ", "`a` ", "`a` _b_ "):
+            text = ScanCountingStr(span * 5000)
+            ScanCountingStr.scanned = 0
+
+            nodes = text_to_textnodes(text)
+
+            self.assertEqual(len(nodes), 2 * 5000 * span.count(" "))
+            self.assertLess(ScanCountingStr.scanned, 4 * len(text), span)
+
+    def test_text_to_text_nodes_reports_delimiters_in_pass_order(self):
+        cases = [
+            ("`code` _a_ **b", "**"),
+            ("`open _a_ _b", "_"),
+            ("`a_b`", "_"),
+            ("_a_ `b", "`"),
+        ]
+        for text, delimiter in cases:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError) as context:
+                    text_to_textnodes(text)
+                self.assertEqual(
+                    str(context.exception),
+                    f"invalid markdown: missing closing delimiter, {delimiter}",
+                )
+
     def test_markdown_to_blocks(self):
         md = """
 This is **bolded** paragraph
@@ -573,3 +700,48 @@ This is the same paragraph on a new line
                 "- This is a list\n- with items",
             ],
         )
+
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        set_inline_cache(0)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(inline_cache_info())
+        self.assertEqual(parse_inline("a **b**"), text_to_textnodes("a **b**"))
+
+    def test_repeated_text_is_a_hit(self):
+        set_inline_cache(2)
+
+        parse_inline("Read [more](/more)")
+        parse_inline("Read [more](/more)")
+        parse_inline("other")
+        info = inline_cache_info()
+
+        assert info is not None
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 2, 2))
+
+    def test_cached_results_cannot_be_mutated(self):
+        set_inline_cache(8)
+
+        first = parse_inline("**bold** text")
+        first[0].text = "changed"
+        first.append(TextNode("extra", TextType.TEXT))
+        second = parse_inline("**bold** text")
+
+        self.assertEqual(
+            second,
+            [TextNode("bold", TextType.BOLD), TextNode(" text", TextType.TEXT)],
+        )
+        self.assertIsNot(first[1], second[1])
+
+    def test_errors_are_not_cached(self):
+        set_inline_cache(8)
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                parse_inline("**unclosed")
+        info = inline_cache_info()
+
+        assert info is not None
+        self.assertEqual((info.hits, info.currsize), (0, 0))
@@ -0,0 +1,101 @@
+import unittest
+
+from flatdoc import FlatDocument, Op, flatten_markdown
+from htmlnode import ParentNode
+from markdown_to_html import markdown_to_html_node
+
+MARKDOWN = """
+# The **Title**
+
+This is **bolded** paragraph
+text in a p
+tag here with [a link](/about) and ![an image](/img.png)
+
+> a quote with _italic_
+> over two lines
+
+- first item
+- second `code` item
+
+1. one
+2. two & three
+
+```
+if a < b:
+    return "c"
+```
+"""
+
+
+class TestFlatDocument(unittest.TestCase):
+    def test_renders_like_the_node_tree(self):
+        for basepath in ("/", "/blog/"):
+            document = flatten_markdown(MARKDOWN, basepath)
+            expected = markdown_to_html_node(MARKDOWN, basepath).to_html()
+
+            self.assertEqual(document.to_html(), expected)
+            self.assertEqual("".join(document.iter_html()), expected)
+
+    def test_to_node_rebuilds_the_tree(self):
+        document = flatten_markdown(MARKDOWN, "/blog/")
+        node = document.to_node()
+
+        self.assertIsInstance(node, ParentNode)
+        self.assertEqual(
+            node.to_html(), markdown_to_html_node(MARKDOWN, "/blog/").to_html()
+        )
+
+    def test_text_points_into_the_source(self):
+        document = flatten_markdown("plain **bold** text")
+
+        self.assertEqual(document.buffer, "plain **bold** text")
+        self.assertEqual(
+            list(document.ops),
+            [Op.OPEN, Op.OPEN, Op.LEAF, Op.LEAF, Op.LEAF, Op.CLOSE, Op.CLOSE],
+        )
+        spans = [
+            document.buffer[start:end]
+            for op, start, end in zip(document.ops, document.starts, document.ends)
+            if op == Op.LEAF
+        ]
+        self.assertEqual(spans, ["plain ", "bold", " text"])
+
+    def test_joined_lines_are_appended_to_the_buffer(self):
+        document = flatten_markdown("one\ntwo")
+
+        self.assertEqual(document.buffer, "one\ntwoone two")
+        self.assertEqual(document.to_html(), "<div><p>one two</p></div>")
+
+    def test_pieces_map_back_to_their_lines(self):
+        markdown = "> **bold\n> across** and _it_\n> `code`"
+        document = flatten_markdown(markdown)
+
+        # only pieces spanning a line break are copied after the source
+        self.assertEqual(document.buffer, markdown + "bold across ")
+        spans = [
+            (start, end)
+            for op, start, end in zip(document.ops, document.starts, document.ends)
+            if op == Op.LEAF
+        ]
+        self.assertEqual(
+            spans[1:],
+            [
+                (markdown.index(" and"), markdown.index(" and") + 5),
+                (markdown.index("it"), markdown.index("it") + 2),
+                (len(markdown) + 11, len(markdown) + 12),
+                (markdown.index("code"), markdown.index("code") + 4),
+            ],
+        )
+
+    def test_long_multi_line_paragraphs_match_the_node_tree(self):
+        lines = ["a **b", "c** _d_ `e`", "f [g](/h) i"] * 3000
+        for markdown in ("\n".join(lines), "> " + "\n> ".join(lines)):
+            expected = markdown_to_html_node(markdown).to_html()
+
+            self.assertEqual(flatten_markdown(markdown).to_html(), expected)
+
+    def test_empty_document(self):
+        document = flatten_markdown("")
+
+        self.assertIsInstance(document, FlatDocument)
+        self.assertEqual(document.to_html(), "<div></div>")
@@ -1,6 +1,11 @@
+import os
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 
-from generate_html import extract_title
+import generate_html
+from generate_html import BuildError, extract_title, generate_pages_recursive
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -26,3 +31,227 @@ and some even more text
         self.assertEqual(
             extract_title(md), "This is a heading to be extracted as a title"
         )
+
+
+class TestGeneratePagesRecursive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.manifest = os.path.join(self.tmp.name, ".cache", "pages.json")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path: str, data: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(data)
+
+    def build(self, basepath="/", jobs=1):
+        return generate_pages_recursive(
+            self.content, self.template, self.dest, basepath, self.manifest, jobs
+        ).to_dict()
+
+    def count_renders(self, basepath="/") -> int:
+        with mock.patch.object(
+            generate_html,
+            "parse_markdown",
+            wraps=generate_html.parse_markdown,
+        ) as render:
+            self.build(basepath)
+        return render.call_count
+
+    def test_first_build_adds_every_page(self):
+        self.assertEqual(
+            self.build(),
+            {
+                "added": ["blog/post/index.html", "index.html"],
+                "changed": [],
+                "removed": [],
+            },
+        )
+
+    def test_identical_output_is_not_rewritten(self):
+        self.build()
+        index = os.path.join(self.dest, "index.html")
+        os.utime(index, ns=(1, 1))
+
+        self.assertEqual(self.build(), {"added": [], "changed": [], "removed": []})
+        self.assertEqual(os.stat(index).st_mtime_ns, 1)
+
+    def test_changed_source_is_reported(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# New Home")
+
+        self.assertEqual(self.build()["changed"], ["index.html"])
+
+    def test_pages_without_source_are_pruned(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+
+        self.assertEqual(self.build()["removed"], ["blog/post/index.html"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+
+    def test_unchanged_pages_are_not_rendered_again(self):
+        self.assertEqual(self.count_renders(), 2)
+        self.assertEqual(self.count_renders(), 0)
+
+    def test_touched_but_identical_source_is_not_rendered_again(self):
+        self.build()
+        os.utime(os.path.join(self.content, "index.md"), ns=(1, 1))
+
+        self.assertEqual(self.count_renders(), 0)
+
+    def test_cache_is_invalidated_by_source(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home again")
+
+        self.assertEqual(self.count_renders(), 1)
+
+    def test_template_change_retemplates_cached_bodies(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+
+        self.assertEqual(self.count_renders(), 0)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertEqual(f.read(), "<h1>Home</h1><div><h1>Home</h1></div>")
+
+    def test_basepath_change_rebases_cached_bodies(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[blog](/blog)")
+        self.build()
+
+        self.assertEqual(self.count_renders("/tonytalks/"), 0)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertIn('<a href="/tonytalks/blog">blog</a>', f.read())
+
+        self.assertEqual(self.count_renders("/"), 0)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertIn('<a href="/blog">blog</a>', f.read())
+
+    def test_bodies_of_removed_pages_are_pruned(self):
+        self.build()
+        bodies = os.path.join(os.path.dirname(self.manifest), "bodies")
+        self.assertEqual(len(os.listdir(bodies)), 2)
+
+        os.remove(os.path.join(self.content, "index.md"))
+        self.build()
+
+        self.assertEqual(len(os.listdir(bodies)), 1)
+
+    def test_deleted_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.dest, "index.html"))
+
+        self.assertEqual(self.build()["added"], ["index.html"])
+
+    def test_parallel_build_matches_serial_build(self):
+        for i in range(6):
+            page = os.path.join(self.content, f"p{i}", "index.md")
+            self.write(page, f"# Page {i}")
+
+        self.assertEqual(len(self.build(jobs=3)["added"]), 8)
+        with open(os.path.join(self.dest, "p4", "index.html")) as f:
+            self.assertEqual(f.read(), "<title>Page 4</title><div><h1>Page 4</h1></div>")
+
+    def test_failures_are_aggregated(self):
+        self.write(os.path.join(self.content, "bad1", "index.md"), "no title")
+        self.write(os.path.join(self.content, "bad2", "index.md"), "**unclosed")
+
+        for jobs in [1, 2]:
+            with self.assertRaises(BuildError) as context:
+                self.build(jobs=jobs)
+
+            failures = context.exception.failures
+            self.assertEqual(
+                [source for source, _ in failures],
+                [
+                    os.path.join(self.content, "bad1", "index.md"),
+                    os.path.join(self.content, "bad2", "index.md"),
+                ],
+            )
+            self.assertIn("ValueError", failures[1][1])
+            self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_large_pages_are_streamed_to_the_same_output(self):
+        page = os.path.join(self.content, "big", "index.md")
+        self.write(
+            page,
+            "# Big _one_\r\n\r\nSome **text** & [a link](/x)\n\n"
+            "- one\r- two\n\n```\ncode < here\n```\r\r> quote\n",
+        )
+        self.build("/blog/")
+        with open(os.path.join(self.dest, "big", "index.html")) as f:
+            expected = f.read()
+        os.remove(os.path.join(self.dest, "big", "index.html"))
+
+        with (
+            mock.patch.object(generate_html, "STREAM_THRESHOLD", 0),
+            mock.patch.object(generate_html, "parse_markdown") as parse,
+        ):
+            self.assertEqual(self.build("/blog/")["added"], ["big/index.html"])
+
+        self.assertEqual(parse.call_count, 0)
+        with open(os.path.join(self.dest, "big", "index.html")) as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_lone_carriage_returns_end_lines(self):
+        self.write(os.path.join(self.content, "cr", "index.md"), "# CR\r\r- a\r- b")
+        self.write(os.path.join(self.content, "lf", "index.md"), "# CR\n\n- a\n- b")
+
+        for threshold in (generate_html.STREAM_THRESHOLD, 0):
+            shutil.rmtree(self.dest, ignore_errors=True)
+            with mock.patch.object(generate_html, "STREAM_THRESHOLD", threshold):
+                self.build()
+            with open(os.path.join(self.dest, "cr", "index.html")) as f:
+                page = f.read()
+            with open(os.path.join(self.dest, "lf", "index.html")) as f:
+                self.assertEqual(page, f.read())
+            self.assertIn("<li>b</li>", page)
+
+    def test_streamed_page_without_title_fails(self):
+        self.write(os.path.join(self.content, "bad", "index.md"), "no title")
+
+        with mock.patch.object(generate_html, "STREAM_THRESHOLD", 0):
+            with self.assertRaises(BuildError) as context:
+                self.build()
+
+        self.assertIn(generate_html.MISSING_TITLE, context.exception.failures[0][1])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "bad", "index.html")))
+
+    def test_missing_template_fails_without_pruning(self):
+        self.build()
+        os.remove(self.template)
+
+        with self.assertRaises(BuildError) as context:
+            self.build()
+
+        self.assertEqual(len(context.exception.failures), 2)
+        self.assertEqual(context.exception.delta.removed, [])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(self.build()["removed"], [])
+
+    def test_profiles_are_collected_for_built_pages(self):
+        for jobs in [1, 2]:
+            profiles = []
+            delta = generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                self.manifest,
+                jobs,
+                profiles,
+            )
+            # the second build is warm, but profiling still parses every page
+            self.assertEqual(len(profiles), 2)
+            self.assertGreater(profiles[0].phases["inline"], 0)
+            self.assertGreater(profiles[0].peak_memory, 0)
+            if jobs == 2:
+                self.assertEqual(delta.to_dict()["changed"], [])
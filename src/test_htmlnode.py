@@ -1,6 +1,18 @@
+import io
+import sys
 import unittest
+from unittest import mock
 
-from htmlnode import HTMLNode, LeafNode, ParentNode, Props
+import htmlnode
+
+from htmlnode import (
+    HTMLNode,
+    LeafNode,
+    ParentNode,
+    Props,
+    escape_attribute,
+    escape_text,
+)
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -37,6 +49,14 @@ class TestHTMLNode(unittest.TestCase):
 
         self.assertEqual(expected, actual)
 
+    def test_nodes_have_no_instance_dict(self):
+        for node in [
+            HTMLNode("p", "text"),
+            LeafNode("b", "bold"),
+            ParentNode("div", [LeafNode(None, "x")]),
+        ]:
+            self.assertFalse(hasattr(node, "__dict__"), type(node).__name__)
+
 
 class TestLeafNode(unittest.TestCase):
     def test_repr_no_props(self):
@@ -61,6 +81,39 @@ class TestLeafNode(unittest.TestCase):
 
         self.assertEqual(expected, actual)
 
+    def test_value_is_escaped(self):
+        node = LeafNode("code", "a < b && c > d")
+
+        self.assertEqual(node.to_html(), "<code>a &lt; b &amp;&amp; c &gt; d</code>")
+
+    def test_raw_text_is_escaped(self):
+        node = LeafNode(None, "1 < 2")
+
+        self.assertEqual(node.to_html(), "1 &lt; 2")
+
+    def test_prop_values_are_escaped(self):
+        node = LeafNode("a", "link", {"href": '/search?q="x"&page=2'})
+
+        self.assertEqual(
+            node.to_html(),
+            '<a href="/search?q=&quot;x&quot;&amp;page=2">link</a>',
+        )
+
+
+class TestEscape(unittest.TestCase):
+    def test_plain_text_is_returned_unchanged(self):
+        text = "nothing to see here"
+
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+
+    def test_ampersand_is_escaped_once(self):
+        self.assertEqual(escape_text("<&>"), "&lt;&amp;&gt;")
+
+    def test_quotes_are_only_escaped_in_attributes(self):
+        self.assertEqual(escape_text('say "hi"'), 'say "hi"')
+        self.assertEqual(escape_attribute('say "hi"'), "say &quot;hi&quot;")
+
 
 class TestParentNode(unittest.TestCase):
     def test_to_html_with_children(self):
@@ -113,6 +166,67 @@ class TestParentNode(unittest.TestCase):
             '<div><span><a href="https://www.google.com" target="_blank"><i>grandchild</i></a></span></div>',
         )
 
+    def test_iter_html_streams_the_same_html_as_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "hi "), LeafNode("b", "there")]),
+                LeafNode("a", "link", {"href": "/x"}),
+            ],
+        )
+
+        with mock.patch.object(htmlnode, "CHUNK_PIECES", 2):
+            chunks = list(node.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), node.to_html())
+
+    def test_write_html_writes_to_file_object(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "item")])])
+        fp = io.StringIO()
+
+        node.write_html(fp)
+
+        self.assertEqual(fp.getvalue(), "<ul><li>item</li></ul>")
+
+    def test_iter_html_with_no_tag(self):
+        parent_node = ParentNode(None, [LeafNode("b", "child")])  # pyright: ignore[reportArgumentType]
+
+        with self.assertRaises(ValueError):
+            _ = list(parent_node.iter_html())
+
+    def test_deep_nesting_does_not_hit_the_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 3
+        node = LeafNode("b", "deep")
+        for _ in range(depth):
+            node = ParentNode("blockquote", [node])
+
+        html = node.to_html()
+
+        self.assertTrue(html.startswith("<blockquote>" * depth + "<b>deep</b>"))
+        self.assertTrue(html.endswith("</blockquote>" * depth))
+        self.assertEqual("".join(node.iter_html()), html)
+
+    def test_children_keep_their_order(self):
+        node = ParentNode(
+            "ol",
+            [ParentNode("li", [LeafNode(None, str(i))]) for i in range(3000)],
+        )
+
+        self.assertEqual(
+            node.to_html(),
+            "<ol>" + "".join(f"<li>{i}</li>" for i in range(3000)) + "</ol>",
+        )
+
+    def test_nested_child_with_no_children(self):
+        node = ParentNode("div", [ParentNode("p", None)])  # pyright: ignore[reportArgumentType]
+
+        with self.assertRaises(ValueError) as context:
+            _ = node.to_html()
+
+        self.assertEqual(
+            str(context.exception), "All parent nodes must have children"
+        )
+
 
 if __name__ == "__main__":
     unittest.main()  # pyright: ignore[reportUnusedCallResult]
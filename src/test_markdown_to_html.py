@@ -1,6 +1,6 @@
 import unittest
 
-from markdown_to_html import markdown_to_html_node
+from markdown_to_html import markdown_to_html_node, parse_excerpt, parse_markdown
 
 
 class TestMarkdownToHtmlNode(unittest.TestCase):
@@ -166,3 +166,119 @@ the **same** even with inline stuff
             html,
             "<div><ol><li>Go <b>to</b> <i>the</i> sto</li><li>Do <b>the</b> laundry</li><li>Fold <i>the</i> laundry</li><li>Cry</li></ol></div>",
         )
+
+    def test_basepath_applies_to_links_and_images_only(self):
+        md = """
+[home](/) and ![cat](/cat.png)
+
+```
+<a href="/not-a-link">
+```
+"""
+
+        node = markdown_to_html_node(md, "/tonytalks/")
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/tonytalks/">home</a> and <img src="/tonytalks/cat.png" alt="cat"></img></p><pre><code>&lt;a href="/not-a-link"&gt;\n</code></pre></div>',
+        )
+
+    def test_special_characters_are_escaped(self):
+        md = """
+[< Back Home](/?a=1&b="2") and 1 < 2
+
+```
+if a < b && c > d:
+```
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/?a=1&amp;b=&quot;2&quot;">&lt; Back Home</a> and 1 &lt; 2</p><pre><code>if a &lt; b &amp;&amp; c &gt; d:\n</code></pre></div>',
+        )
+
+
+class TestParseMarkdown(unittest.TestCase):
+    def test_document_metadata(self):
+        md = """
+# The **Title** #
+still the heading
+
+Some _intro_ text here
+
+## Section one
+
+- a list item
+
+### Sub section
+"""
+
+        document = parse_markdown(md)
+        self.assertEqual(document.title, "The **Title**")
+        self.assertEqual(
+            document.outline,
+            [
+                (1, "The **Title** #\nstill the heading"),
+                (2, "Section one"),
+                (3, "Sub section"),
+            ],
+        )
+        self.assertEqual(document.word_count, 17)
+        self.assertEqual(document.node.to_html(), markdown_to_html_node(md).to_html())
+
+    def test_title_is_none_without_leading_h1(self):
+        self.assertIsNone(parse_markdown("intro\n\n# Late heading").title)
+        self.assertIsNone(parse_markdown("## Not a title").title)
+
+
+class TestParseExcerpt(unittest.TestCase):
+    md = """
+# The _Title_
+
+First **paragraph**
+of the post.
+
+## Section
+
+Second paragraph with **unclosed bold
+"""
+
+    def test_title_and_first_block(self):
+        excerpt = parse_excerpt(self.md)
+
+        self.assertEqual(excerpt.title, "The _Title_")
+        self.assertEqual(
+            excerpt.node.to_html(),
+            "<div><p>First <b>paragraph</b> of the post.</p></div>",
+        )
+        self.assertEqual(excerpt.word_count, 5)
+        self.assertEqual(excerpt.outline, [])
+
+    def test_later_blocks_are_never_parsed(self):
+        with self.assertRaises(ValueError):
+            parse_markdown(self.md)
+
+        excerpt = parse_excerpt(self.md, max_blocks=2)
+
+        self.assertEqual(excerpt.outline, [(2, "Section")])
+
+    def test_max_chars_stops_after_the_block_reaching_it(self):
+        excerpt = parse_excerpt(self.md, max_blocks=None, max_chars=10)
+
+        self.assertEqual(len(excerpt.node.children or []), 1)
+
+    def test_document_without_title(self):
+        excerpt = parse_excerpt("Just text.\n\nMore text.", max_blocks=5)
+
+        self.assertIsNone(excerpt.title)
+        self.assertEqual(
+            excerpt.node.to_html(), "<div><p>Just text.</p><p>More text.</p></div>"
+        )
+
+    def test_empty_document(self):
+        excerpt = parse_excerpt("")
+
+        self.assertIsNone(excerpt.title)
+        self.assertEqual(excerpt.node.to_html(), "<div></div>")
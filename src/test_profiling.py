@@ -0,0 +1,68 @@
+import unittest
+
+from profiling import PHASES, PageProfile, build_report, format_slowest, slowest
+
+
+def make_profile(source: str, **phases_ms: int) -> PageProfile:
+    profile = PageProfile(source)
+    for name, ms in phases_ms.items():
+        profile.add(name, ms * 1_000_000)
+    return profile
+
+
+class TestPageProfile(unittest.TestCase):
+    def test_phase_accumulates_elapsed_time(self):
+        profile = PageProfile("a.md")
+        with profile.phase("render"):
+            pass
+        with profile.phase("render"):
+            pass
+
+        self.assertGreater(profile.phases["render"], 0)
+        self.assertEqual(profile.total_ns, profile.phases["render"])
+
+    def test_track_memory_records_peak(self):
+        profile = PageProfile("a.md")
+        with profile.track_memory():
+            _ = [str(i) for i in range(10_000)]
+
+        self.assertGreater(profile.peak_memory, 0)
+
+
+class TestReport(unittest.TestCase):
+    def setUp(self):
+        self.profiles = [
+            make_profile("fast.md", read=1, render=1),
+            make_profile("slow.md", inline=30, write=5),
+            make_profile("medium.md", blocks=4, render=6),
+        ]
+
+    def test_slowest_orders_by_total_time(self):
+        self.assertEqual(
+            [profile.source for profile in slowest(self.profiles, 2)],
+            ["slow.md", "medium.md"],
+        )
+
+    def test_build_report(self):
+        report = build_report(self.profiles, top=1)
+
+        self.assertEqual(report["pages"], 3)
+        self.assertEqual(report["total_ms"], 47)
+        self.assertEqual(list(report["phases_ms"]), list(PHASES))
+        self.assertEqual(report["phases_ms"]["inline"], 30)
+        self.assertEqual([page["source"] for page in report["slowest"]], ["slow.md"])
+        self.assertEqual(
+            [page["source"] for page in report["all"]],
+            ["fast.md", "medium.md", "slow.md"],
+        )
+
+    def test_format_slowest_names_the_busiest_phase(self):
+        lines = format_slowest(self.profiles, 1).split("\n")
+
+        self.assertEqual(lines[0], "Slowest 1 of 3 page(s):")
+        self.assertIn("inline", lines[1])
+        self.assertTrue(lines[1].endswith("slow.md"))
+
+
+if __name__ == "__main__":
+    unittest.main()  # pyright: ignore[reportUnusedCallResult]
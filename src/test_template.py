@@ -0,0 +1,161 @@
+import os
+import tempfile
+import unittest
+
+from template import Template, load_fragment, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        template = Template("<title>{{ Title }}</title><article>{{Content}}</article>")
+
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>body</p>"),
+            "<title>Hi</title><article><p>body</p></article>",
+        )
+
+    def test_slot_values_are_not_rescanned(self):
+        template = Template("{{ Content }}{{ Title }}")
+
+        self.assertEqual(
+            template.render(Title="t", Content="{{ Title }}"), "{{ Title }}t"
+        )
+
+    def test_iter_render_streams_iterable_values(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}!")
+
+        chunks = template.iter_render(Title="t", Content=iter(["<p>", "x", "</p>"]))
+
+        self.assertEqual("".join(chunks), "<title>t</title><p>x</p>!")
+
+    def test_unknown_slots_are_left_in_place(self):
+        template = Template("<p>{{ Missing }}</p>")
+
+        self.assertEqual(template.render(), "<p>{{ Missing }}</p>")
+
+    def test_basepath_is_applied_to_template_literals(self):
+        template = Template(
+            '<link href="/index.css" /><img src="/a.png" />{{ Content }}',
+            "/tonytalks/",
+        )
+
+        self.assertEqual(
+            template.render(Content='<a href="/x">x</a>'),
+            '<link href="/tonytalks/index.css" /><img src="/tonytalks/a.png" /><a href="/x">x</a>',
+        )
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_cache_is_keyed_on_file_stat(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("<b>{{ Title }}</b>")
+
+            first = load_template(path)
+            self.assertIs(first, load_template(path))
+
+            with open(path, "w") as f:
+                f.write("<i>{{ Title }}</i>")
+            os.utime(path, ns=(1, 1))
+
+            second = load_template(path)
+            self.assertIsNot(first, second)
+            self.assertNotEqual(first.digest, second.digest)
+            self.assertEqual(second.render(Title="t"), "<i>t</i>")
+
+
+class TestPartialsAndLayouts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: str) -> str:
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(data)
+        return path
+
+    def test_includes_are_relative_to_the_including_file(self):
+        self.write("partials/nav.html", '<nav>{{ include "link.html" }}</nav>')
+        self.write("partials/link.html", '<a href="/">Home</a>')
+        path = self.write(
+            "template.html", '{{ include "partials/nav.html" }}{{ Content }}'
+        )
+
+        template = load_template(path, "/blog/")
+
+        self.assertEqual(
+            template.render(Content="<p>x</p>"),
+            '<nav><a href="/blog/">Home</a></nav><p>x</p>',
+        )
+        self.assertEqual(len(template.files), 3)
+
+    def test_child_blocks_override_the_layout(self):
+        self.write(
+            "base.html",
+            "<title>{% block %}{{ block title }}{{ Title }}{{ endblock }}</title>"
+            "<main>{{ block main }}default{{ endblock }}</main>"
+            "<footer>{{ block footer }}base footer{{ endblock }}</footer>",
+        )
+        self.write(
+            "section.html",
+            '{{ extends "base.html" }}'
+            "{{ block footer }}section footer{{ endblock }}"
+            "{{ block main }}section{{ endblock }}",
+        )
+        path = self.write(
+            "page.html",
+            '{{ extends "section.html" }}'
+            "ignored{{ block main }}<article>{{ Content }}</article>{{ endblock }}",
+        )
+
+        template = load_template(path)
+
+        self.assertEqual(
+            template.render(Title="t", Content="c"),
+            "<title>{% block %}t</title><main><article>c</article></main>"
+            "<footer>section footer</footer>",
+        )
+
+    def test_include_cycles_are_rejected(self):
+        self.write("a.html", '{{ include "b.html" }}')
+        self.write("b.html", '{{ include "a.html" }}')
+
+        with self.assertRaisesRegex(ValueError, "template cycle"):
+            load_template(os.path.join(self.tmp.name, "a.html"))
+
+    def test_unclosed_block_is_rejected(self):
+        path = self.write("page.html", "{{ block main }}x")
+
+        with self.assertRaisesRegex(ValueError, "never closed"):
+            load_template(path)
+
+    def test_partial_change_invalidates_template(self):
+        partial = self.write("footer.html", "<footer>1</footer>")
+        path = self.write("template.html", '{{ include "footer.html" }}')
+        first = load_template(path)
+
+        self.write("footer.html", "<footer>22</footer>")
+        os.utime(partial, ns=(1, 1))
+        second = load_template(path)
+
+        self.assertNotEqual(first.digest, second.digest)
+        self.assertEqual(second.render(), "<footer>22</footer>")
+
+    def test_fragments_are_cached_by_content_hash(self):
+        path = self.write("footer.html", "<footer>{{ Title }}</footer>")
+        first = load_fragment(path)
+
+        os.utime(path, ns=(1, 1))
+        self.assertIs(load_fragment(path), first)
+
+        self.write("footer.html", "<footer>changed</footer>")
+        self.assertIsNot(load_fragment(path), first)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pyright: ignore[reportUnusedCallResult]
@@ -28,6 +28,13 @@ class TestTextNode(unittest.TestCase):
         )
         self.assertNotEqual(node, node2)
 
+    def test_nodes_have_no_instance_dict(self):
+        node = TextNode("this is a text node", TextType.TEXT)
+
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = "nope"  # pyright: ignore[reportAttributeAccessIssue]
+
 
 if __name__ == "__main__":
     unittest.main()  # pyright: ignore[reportUnusedCallResult]
@@ -0,0 +1,160 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import generate_html
+import watch
+from generate_html import generate_pages_recursive
+from watch import Watcher, changed_paths, snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_changed_paths(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+
+        self.assertEqual(changed_paths(old, new), (["b", "d"], ["c"]))
+
+    def test_snapshot_walks_nested_directories(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "a", "b"))
+            for path in ["x.md", "a/y.md", "a/b/z.md"]:
+                with open(os.path.join(tmp, path), "w") as f:
+                    f.write(path)
+
+            self.assertEqual(
+                sorted(os.path.relpath(path, tmp) for path in snapshot(tmp)),
+                ["a/b/z.md", "a/y.md", "x.md"],
+            )
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.bodies = os.path.join(self.tmp.name, "bodies")
+        # the build the watcher starts after, which fills the body cache
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                manifest_path=os.path.join(self.tmp.name, "pages.json"),
+                body_cache=self.bodies,
+            )
+        self.watcher = Watcher(
+            self.content,
+            self.static,
+            self.template,
+            self.dest,
+            static_manifest=os.path.join(self.tmp.name, "static.json"),
+            body_cache=self.bodies,
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path: str, data: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(data)
+
+    def read(self, path: str) -> str:
+        with open(path) as f:
+            return f.read()
+
+    def test_markdown_change_rebuilds_only_that_page(self):
+        self.write(os.path.join(self.content, "blog", "index.md"), "# New Blog")
+
+        self.assertEqual(
+            self.watcher.poll(), [os.path.join(self.dest, "blog", "index.html")]
+        )
+        page = self.read(os.path.join(self.dest, "blog", "index.html"))
+        self.assertIn("New Blog", page)
+
+    def test_poll_does_not_collect_every_page(self):
+        self.write(os.path.join(self.content, "new.md"), "# New")
+
+        with mock.patch.object(watch, "collect_pages") as collect:
+            updated = self.watcher.poll()
+
+        self.assertEqual(collect.call_count, 0)
+        self.assertEqual(updated, [os.path.join(self.dest, "new.html")])
+        self.assertIn("New", self.read(os.path.join(self.dest, "new.html")))
+
+    def test_template_change_does_not_reparse(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>")
+
+        with mock.patch.object(
+            generate_html, "parse_page", wraps=generate_html.parse_page
+        ) as parse_page:
+            updated = self.watcher.poll()
+
+        self.assertEqual(parse_page.call_count, 0)
+        self.assertEqual(len(updated), 2)
+        page = self.read(os.path.join(self.dest, "index.html"))
+        self.assertEqual(page, "<h1>Home</h1>")
+
+    def test_template_change_without_cached_bodies_parses(self):
+        shutil.rmtree(self.bodies)
+        self.write(self.template, "<h1>{{ Title }}</h1>")
+
+        with mock.patch.object(
+            generate_html, "parse_page", wraps=generate_html.parse_page
+        ) as parse_page:
+            self.watcher.poll()
+            self.write(self.template, "<h2>{{ Title }}</h2>")
+            self.watcher.poll()
+
+        # parsed once, then re-templated from the cache
+        self.assertEqual(parse_page.call_count, 2)
+        page = self.read(os.path.join(self.dest, "index.html"))
+        self.assertEqual(page, "<h2>Home</h2>")
+
+    def test_partial_change_rewrites_pages(self):
+        partial = os.path.join(self.tmp.name, "footer.html")
+        self.write(partial, "<footer>one</footer>")
+        self.write(self.template, '<h1>{{ Title }}</h1>{{ include "footer.html" }}')
+        self.watcher.poll()
+
+        self.write(partial, "<footer>three</footer>")
+        updated = self.watcher.poll()
+
+        self.assertEqual(len(updated), 2)
+        page = self.read(os.path.join(self.dest, "index.html"))
+        self.assertEqual(page, "<h1>Home</h1><footer>three</footer>")
+
+    def test_removed_markdown_removes_page(self):
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.watcher.poll()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+
+        self.watcher.poll()
+
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+
+    def test_static_change_syncs_only_that_asset(self):
+        self.write(os.path.join(self.static, "new.css"), "a {}")
+
+        self.assertEqual(self.watcher.poll(), [os.path.join(self.dest, "new.css")])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css")))
+
+    def test_broken_page_does_not_stop_polling(self):
+        self.write(os.path.join(self.content, "index.md"), "no title")
+
+        self.assertEqual(self.watcher.poll(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()  # pyright: ignore[reportUnusedCallResult]
@@ -0,0 +1,168 @@
+import os
+import time
+
+from assets import STATIC_MANIFEST, remove_file, sync_directory
+from content import Page, collect_pages, page_for
+from generate_html import BODY_CACHE, build_page
+from template import load_template
+
+type Snapshot = dict[str, tuple[int, int]]
+
+
+def snapshot(root: str) -> Snapshot:
+    files: Snapshot = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        stack.append(entry.path)
+                        continue
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            continue
+    return files
+
+
+def changed_paths(old: Snapshot, new: Snapshot) -> tuple[list[str], list[str]]:
+    changed = sorted(path for path, stat in new.items() if old.get(path) != stat)
+    removed = sorted(old.keys() - new.keys())
+    return changed, removed
+
+
+class Watcher:
+    def __init__(
+        self,
+        content_dir: str,
+        static_dir: str,
+        template_path: str,
+        dest_dir: str,
+        basepath: str = "/",
+        static_manifest: str = STATIC_MANIFEST,
+        body_cache: str = BODY_CACHE,
+    ) -> None:
+        self.content_dir: str = content_dir
+        self.static_dir: str = static_dir
+        self.template_path: str = template_path
+        self.dest_dir: str = dest_dir
+        self.basepath: str = basepath
+        self.static_manifest: str = static_manifest
+        # bodies rendered by the build, so a template change only has to
+        # re-template pages instead of parsing them again
+        self.body_cache: str = body_cache
+        self.pages: dict[str, Page] = self._collect_pages()
+        self.content: Snapshot = _page_snapshot(self.pages)
+        self.static: Snapshot = snapshot(static_dir)
+        self.template: dict[str, tuple[int, int] | None] = self._template_snapshot()
+
+    def poll(self) -> list[str]:
+        updated: list[str] = []
+
+        # a plain walk finds what changed; only those pages are rebuilt
+        content = snapshot(self.content_dir)
+        changed, removed = changed_paths(self.content, content)
+        self.content = content
+        for source_path in removed:
+            page = self.pages.pop(source_path)
+            remove_file(self.dest_dir, page.rel_path)
+            updated.append(page.dest)
+        for source_path in changed:
+            mtime_ns, size = content[source_path]
+            self.pages[source_path] = page_for(
+                source_path, self.content_dir, self.dest_dir, size, mtime_ns
+            )
+            updated.extend(self._write([source_path]))
+
+        # the template and every partial or layout it pulls in
+        template = {path: _stat(path) for path in self.template}
+        if template != self.template:
+            self.template = self._template_snapshot()
+            if self.template.get(self.template_path) is not None:
+                updated.extend(self._write(sorted(self.content)))
+
+        static = snapshot(self.static_dir)
+        changed, removed = changed_paths(self.static, static)
+        self.static = static
+        if changed or removed:
+            delta = sync_directory(
+                self.static_dir,
+                self.dest_dir,
+                self.static_manifest,
+                only=[
+                    os.path.relpath(path, self.static_dir)
+                    for path in changed + removed
+                ],
+            )
+            for rel_path in delta.added + delta.changed + delta.removed:
+                updated.append(os.path.join(self.dest_dir, rel_path))
+
+        return updated
+
+    def run(self, interval: float = 0.05) -> None:
+        print(
+            f"Watching {self.content_dir}, {self.static_dir} "
+            f"and {self.template_path} for changes"
+        )
+        while True:
+            started = time.perf_counter()
+            updated = self.poll()
+            if updated:
+                elapsed = (time.perf_counter() - started) * 1000
+                print(f"Rebuilt {len(updated)} file(s) in {elapsed:.1f}ms")
+            time.sleep(interval)
+
+    def _write(self, source_paths: list[str]) -> list[str]:
+        # a broken template is reported once, not once per page
+        try:
+            load_template(self.template_path, self.basepath)
+        except (OSError, ValueError) as e:
+            print(f"{self.template_path}: {type(e).__name__}: {e}")
+            return []
+        written: list[str] = []
+        for source_path in source_paths:
+            page = self.pages[source_path]
+            try:
+                # no manifest entry: the body cache decides whether to parse
+                status, _ = build_page(
+                    source_path,
+                    self.template_path,
+                    page.dest,
+                    self.basepath,
+                    source_stat=(page.size, page.mtime_ns),
+                    body_cache=self.body_cache,
+                )
+            except Exception as e:
+                print(f"{source_path}: {type(e).__name__}: {e}")
+                continue
+            if status in ("added", "changed"):
+                written.append(page.dest)
+        return written
+
+    def _template_snapshot(self) -> dict[str, tuple[int, int] | None]:
+        try:
+            files = load_template(self.template_path, self.basepath).files
+        except (OSError, ValueError):
+            files = [self.template_path]
+        return {path: _stat(path) for path in files}
+
+    def _collect_pages(self) -> dict[str, Page]:
+        try:
+            pages = collect_pages(self.content_dir, self.dest_dir)
+        except FileNotFoundError:
+            return {}
+        return {page.source: page for page in pages}
+
+
+def _page_snapshot(pages: dict[str, Page]) -> Snapshot:
+    return {source: (page.mtime_ns, page.size) for source, page in pages.items()}
+
+
+def _stat(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size